@@ -1,12 +1,43 @@
 const express = require('express');
 const cors = require('cors');
-const { spawn } = require('child_process');
 const path = require('path');
+const { PredictorPool } = require('./predictorPool');
+const { MicroBatcher } = require('./microBatcher');
+const { Registry, renderPrometheus } = require('./metrics');
 
 const app = express();
-const PORT = 3000;
+const PORT = parseInt(process.env.PORT || '3000', 10);
+
+// Backend metrics, served with the workers' own on GET /metrics
+const metrics = new Registry();
+const httpDuration = metrics.histogram('http_request_duration_seconds',
+    'HTTP request latency', ['method', 'route', 'status']);
+
+// Warm Python prediction workers (model is loaded once per worker)
+// Note: adjusting path to go UP to root, then DOWN to ml-engine
+const predictor = new PredictorPool({
+    scriptPath: path.join(__dirname, '../../ml-engine/src/predict.py'),
+    pythonPath: process.env.PREDICTOR_PYTHON || path.join(__dirname, '../../ml-engine/.venv/bin/python'),
+    size: parseInt(process.env.PREDICTOR_WORKERS || '2', 10),
+    timeoutMs: parseInt(process.env.PREDICTOR_TIMEOUT_MS || '10000', 10),
+    registry: metrics
+}).start();
+
+// Concurrent analyze requests are sent to the workers in micro-batches
+// (PREDICTOR_BATCH_MAX_SIZE=1 sends every request on its own)
+const batcher = new MicroBatcher(predictor, {
+    maxBatchSize: parseInt(process.env.PREDICTOR_BATCH_MAX_SIZE || '16', 10),
+    maxWaitMs: parseInt(process.env.PREDICTOR_BATCH_MAX_WAIT_MS || '2', 10),
+    registry: metrics
+});
 
 // Middleware
+app.use((req, res, next) => {
+    const observe = httpDuration.startTimer({ method: req.method });
+    // The route is known once the request has been handled
+    res.on('finish', () => observe({ route: req.route ? req.route.path : 'unmatched', status: res.statusCode }));
+    next();
+});
 app.use(cors());
 app.use(express.json());
 
@@ -25,36 +56,22 @@ app.post('/api/analyze', (req, res) => {
 
     console.log(`🧠 Analyzing: "${idea}" in ${industry}, ${city}...`);
 
-    // Define path to Python script
-    // Note: adjusting path to go UP to root, then DOWN to ml-engine
-    const scriptPath = path.join(__dirname, '../../ml-engine/src/predict.py');
-    const pythonPath = path.join(__dirname, '../../ml-engine/.venv/bin/python');
-
-    // Spawn Python Process
-    const pythonProcess = spawn(pythonPath, [scriptPath, idea, industry, city]);
-
-    let dataString = '';
-
-    // Listen for data from Python
-    pythonProcess.stdout.on('data', (data) => {
-        dataString += data.toString();
-    });
-
-    // Handle Errors
-    pythonProcess.stderr.on('data', (data) => {
-        console.error(`Python Error: ${data}`);
-    });
-
-    // When Python script finishes
-    pythonProcess.on('close', (code) => {
-        try {
-            const result = JSON.parse(dataString);
-            res.json(result);
-        } catch (error) {
-            console.error("Failed to parse Python response:", dataString);
-            res.status(500).json({ error: 'Analysis failed', raw: dataString });
-        }
-    });
+    batcher.predict({ pitch: idea, industry, city })
+        .then((result) => res.json(result))
+        .catch((error) => {
+            console.error("Prediction failed:", error.message);
+            res.status(500).json({ error: 'Analysis failed', details: error.message });
+        });
+});
+
+// Prometheus text by default, ?format=json for the raw metric families
+app.get('/metrics', async (req, res) => {
+    const workers = await predictor.workerMetrics();
+    if (req.query.format === 'json') {
+        return res.json({ backend: metrics.collect(), workers });
+    }
+    const sources = [[{}, metrics.collect()], ...workers.map(({ worker, metrics }) => [{ worker }, metrics])];
+    res.type('text/plain; version=0.0.4').send(renderPrometheus(sources));
 });
 
 // Start Server
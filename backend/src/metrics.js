@@ -0,0 +1,166 @@
+// Minimal in-process metrics (counters, gauges, histograms) rendered in the
+// Prometheus text format on GET /metrics. The Python workers keep their own
+// registry (ml-engine/src/metrics.py) in the same JSON family shape, so
+// their families are rendered here too, with a `worker` label added.
+
+// Latency buckets in seconds (0.5 ms .. 10 s), same as metrics.py
+const DEFAULT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+function labelKey(labelNames, labels) {
+    return JSON.stringify(labelNames.map((name) => String(labels[name] ?? '')));
+}
+
+function keyLabels(labelNames, key) {
+    const values = JSON.parse(key);
+    return Object.fromEntries(labelNames.map((name, i) => [name, values[i]]));
+}
+
+class Counter {
+    constructor(name, help, labelNames = []) {
+        Object.assign(this, { name, help, labelNames, values: new Map() });
+    }
+
+    inc(labels = {}, amount = 1) {
+        const key = labelKey(this.labelNames, labels);
+        this.values.set(key, (this.values.get(key) || 0) + amount);
+    }
+
+    collect() {
+        return {
+            name: this.name, type: 'counter', help: this.help,
+            samples: [...this.values].map(([key, value]) => ({ labels: keyLabels(this.labelNames, key), value }))
+        };
+    }
+}
+
+// Value computed on collection: fn() returns [[labels, value], ...]
+class Gauge {
+    constructor(name, help, fn, type = 'gauge') {
+        Object.assign(this, { name, help, fn, type });
+    }
+
+    collect() {
+        return {
+            name: this.name, type: this.type, help: this.help,
+            samples: this.fn().map(([labels, value]) => ({ labels, value }))
+        };
+    }
+}
+
+// Cumulative-bucket histogram, in the shape Prometheus expects
+class Histogram {
+    constructor(name, help, labelNames = [], buckets = DEFAULT_BUCKETS) {
+        Object.assign(this, { name, help, labelNames, buckets, series: new Map() });
+    }
+
+    observe(labels, value) {
+        const key = labelKey(this.labelNames, labels);
+        let series = this.series.get(key);
+        if (!series) {
+            series = { counts: this.buckets.map(() => 0), sum: 0, count: 0 };
+            this.series.set(key, series);
+        }
+        this.buckets.forEach((bound, i) => {
+            if (value <= bound) series.counts[i] += 1;
+        });
+        series.sum += value;
+        series.count += 1;
+    }
+
+    // Returns a function that observes the seconds elapsed since startTimer()
+    startTimer(labels = {}) {
+        const start = process.hrtime.bigint();
+        return (extraLabels = {}) => {
+            this.observe({ ...labels, ...extraLabels }, Number(process.hrtime.bigint() - start) / 1e9);
+        };
+    }
+
+    collect() {
+        return {
+            name: this.name, type: 'histogram', help: this.help,
+            samples: [...this.series].map(([key, series]) => ({
+                labels: keyLabels(this.labelNames, key),
+                buckets: this.buckets.map((bound, i) => [bound, series.counts[i]]),
+                sum: series.sum,
+                count: series.count
+            }))
+        };
+    }
+}
+
+class Registry {
+    constructor() {
+        this.metrics = [];
+    }
+
+    register(metric) {
+        this.metrics.push(metric);
+        return metric;
+    }
+
+    counter(name, help, labelNames) {
+        return this.register(new Counter(name, help, labelNames));
+    }
+
+    gauge(name, help, fn, type) {
+        return this.register(new Gauge(name, help, fn, type));
+    }
+
+    histogram(name, help, labelNames, buckets) {
+        return this.register(new Histogram(name, help, labelNames, buckets));
+    }
+
+    collect() {
+        return this.metrics.map((metric) => metric.collect());
+    }
+}
+
+function formatValue(value) {
+    if (value === Infinity) return '+Inf';
+    if (value === -Infinity) return '-Inf';
+    return Number.isNaN(value) ? 'NaN' : String(value);
+}
+
+function formatLabels(labels) {
+    const pairs = Object.entries(labels).map(([name, value]) => {
+        const escaped = String(value).replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+        return `${name}="${escaped}"`;
+    });
+    return pairs.length ? `{${pairs.join(',')}}` : '';
+}
+
+// Renders metric families as Prometheus text. `sources` is a list of
+// [extraLabels, families] so the same family from several workers is
+// emitted once, with one series per source.
+function renderPrometheus(sources) {
+    const byName = new Map();
+    for (const [extraLabels, families] of sources) {
+        for (const family of families) {
+            if (!byName.has(family.name)) byName.set(family.name, { family, samples: [] });
+            for (const sample of family.samples) {
+                byName.get(family.name).samples.push({ ...sample, labels: { ...extraLabels, ...sample.labels } });
+            }
+        }
+    }
+
+    const lines = [];
+    for (const { family, samples } of byName.values()) {
+        lines.push(`# HELP ${family.name} ${family.help.replace(/\\/g, '\\\\').replace(/\n/g, '\\n')}`);
+        lines.push(`# TYPE ${family.name} ${family.type}`);
+        for (const sample of samples) {
+            if (family.type !== 'histogram') {
+                lines.push(`${family.name}${formatLabels(sample.labels)} ${formatValue(sample.value)}`);
+                continue;
+            }
+            for (const [bound, count] of sample.buckets) {
+                lines.push(`${family.name}_bucket${formatLabels({ ...sample.labels, le: formatValue(bound) })} ${count}`);
+            }
+            lines.push(`${family.name}_bucket${formatLabels({ ...sample.labels, le: '+Inf' })} ${sample.count}`);
+            lines.push(`${family.name}_sum${formatLabels(sample.labels)} ${formatValue(sample.sum)}`);
+            lines.push(`${family.name}_count${formatLabels(sample.labels)} ${sample.count}`);
+        }
+    }
+    return lines.join('\n') + '\n';
+}
+
+module.exports = { DEFAULT_BUCKETS, Counter, Gauge, Histogram, Registry, renderPrometheus };
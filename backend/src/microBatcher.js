@@ -0,0 +1,93 @@
+const os = require('os');
+
+// Collects concurrent /api/analyze requests into micro-batches.
+// Requests arriving within maxWaitMs of the first one in a batch (or until
+// maxBatchSize is reached) go to one worker as a single `batch` command,
+// which scores them with one TF-IDF transform and one forest pass. The
+// timer only starts with the first request, so a lone request waits at
+// most maxWaitMs. A flush is split evenly over the idle workers (at most one
+// per CPU, beyond that they cannot run in parallel anyway), so a burst is
+// not queued on one process while others sit idle. Identical requests
+// (same normalized input) that are queued or in flight at the same time
+// share one prediction.
+class MicroBatcher {
+    constructor(pool, { maxBatchSize = 16, maxWaitMs = 2, registry = null } = {}) {
+        this.pool = pool;
+        this.maxBatchSize = maxBatchSize;
+        this.maxWaitMs = maxWaitMs;
+        this.queue = [];
+        this.timer = null;
+        this.cpus = os.cpus().length;
+        // Normalized input -> promise of its result, while queued or in flight
+        this.shared = new Map();
+
+        if (registry) {
+            this.batchSize = registry.histogram('predictor_batch_size', 'Requests per batch sent to a worker', [],
+                [1, 2, 4, 8, 16, 32, 64]);
+            this.coalesced = registry.counter('predictor_coalesced_total',
+                'Requests answered by an identical concurrent request');
+        }
+    }
+
+    static key({ pitch, industry, city }) {
+        const normalize = (value) => String(value).toLowerCase().split(/\s+/).filter(Boolean).join(' ');
+        return JSON.stringify([normalize(pitch), normalize(industry), normalize(city)]);
+    }
+
+    predict(payload) {
+        const key = MicroBatcher.key(payload);
+        const existing = this.shared.get(key);
+        if (existing) {
+            if (this.coalesced) this.coalesced.inc();
+            return existing;
+        }
+
+        const promise = new Promise((resolve, reject) => {
+            this.queue.push({ payload, resolve, reject });
+        });
+        this.shared.set(key, promise);
+        const forget = () => this.shared.delete(key);
+        promise.then(forget, forget);
+
+        if (this.queue.length >= this.maxBatchSize) {
+            this.flush();
+        } else if (!this.timer) {
+            this.timer = setTimeout(() => this.flush(), this.maxWaitMs);
+        }
+        return promise;
+    }
+
+    flush() {
+        clearTimeout(this.timer);
+        this.timer = null;
+        const queued = this.queue;
+        this.queue = [];
+        if (!queued.length) return;
+
+        const shards = Math.min(queued.length, this.cpus, Math.max(1, this.pool.idleWorkers()));
+        const size = Math.ceil(queued.length / shards);
+        for (let start = 0; start < queued.length; start += size) {
+            this._send(queued.slice(start, start + size));
+        }
+    }
+
+    _send(batch) {
+        if (this.batchSize) this.batchSize.observe({}, batch.length);
+
+        // A single request keeps the plain protocol
+        if (batch.length === 1) {
+            const [entry] = batch;
+            this.pool.predict(entry.payload).then(entry.resolve, entry.reject);
+            return;
+        }
+
+        this.pool.predictBatch(batch.map((entry) => entry.payload))
+            .then(({ results, error }) => {
+                if (!results) throw new Error(error || 'Batch prediction returned no results');
+                batch.forEach((entry, i) => entry.resolve(results[i]));
+            })
+            .catch((error) => batch.forEach((entry) => entry.reject(error)));
+    }
+}
+
+module.exports = { MicroBatcher };
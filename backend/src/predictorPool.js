@@ -0,0 +1,192 @@
+const { spawn } = require('child_process');
+const readline = require('readline');
+const { Registry } = require('./metrics');
+
+// A small pool of long-lived `predict.py --serve` workers.
+// Each worker loads the model once and answers JSON-lines requests,
+// so /api/analyze no longer pays for a fresh interpreter per call.
+class PredictorPool {
+    constructor({ pythonPath, scriptPath, size = 2, timeoutMs = 10000, respawnDelayMs = 1000, registry = new Registry() }) {
+        this.pythonPath = pythonPath;
+        this.scriptPath = scriptPath;
+        this.size = size;
+        this.timeoutMs = timeoutMs;
+        this.respawnDelayMs = respawnDelayMs;
+        this.workers = [];
+        this.nextId = 1;
+        this.closed = false;
+        this._registerMetrics(registry);
+    }
+
+    _registerMetrics(registry) {
+        this.metrics = {
+            roundtrip: registry.histogram('predictor_roundtrip_seconds',
+                'Time from writing a request to a worker until its response is parsed', ['outcome']),
+            parse: registry.histogram('predictor_parse_seconds', 'Time spent parsing worker responses', [],
+                [0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005]),
+            spawnReady: registry.histogram('predictor_spawn_ready_seconds',
+                'Time from spawning a worker until its model is loaded', [],
+                [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]),
+            requests: registry.counter('predictor_requests_total', 'Prediction requests by outcome', ['outcome']),
+            respawns: registry.counter('predictor_respawns_total', 'Workers respawned after exiting')
+        };
+        registry.gauge('predictor_inflight', 'Requests waiting on a worker response', () => [[{}, this.inflight()]]);
+        registry.gauge('predictor_workers', 'Workers by state', () => {
+            const ready = this.workers.filter((worker) => worker.ready && worker.proc.stdin.writable).length;
+            return [[{ state: 'ready' }, ready], [{ state: 'starting' }, this.workers.length - ready]];
+        });
+        // Outstanding requests per worker slot; above 1 requests queue up in a worker
+        registry.gauge('predictor_saturation', 'In-flight requests per worker', () => [[{}, this.inflight() / this.size]]);
+    }
+
+    start() {
+        for (let i = 0; i < this.size; i++) {
+            this.workers.push(this._spawnWorker(i));
+        }
+        return this;
+    }
+
+    inflight() {
+        return this.workers.reduce((total, worker) => total + worker.pending.size, 0);
+    }
+
+    // Loaded workers with nothing in flight
+    idleWorkers() {
+        return this.workers.filter((worker) => worker.ready && worker.proc.stdin.writable && !worker.pending.size).length;
+    }
+
+    _spawnWorker(slot) {
+        const proc = spawn(this.pythonPath, [this.scriptPath, '--serve']);
+        const worker = { slot, proc, pending: new Map(), ready: false, observeReady: this.metrics.spawnReady.startTimer() };
+
+        const lines = readline.createInterface({ input: proc.stdout });
+        lines.on('line', (line) => this._onLine(worker, line));
+
+        proc.stderr.on('data', (data) => {
+            console.error(`Python Error [worker ${slot}]: ${data}`);
+        });
+
+        proc.on('error', (error) => {
+            console.error(`Failed to start predictor worker ${slot}:`, error.message);
+        });
+
+        proc.on('close', (code) => {
+            this._failPending(worker, new Error(`Predictor worker exited with code ${code}`));
+            if (this.closed) return;
+
+            console.error(`⚠️ Predictor worker ${slot} exited (code ${code}), respawning...`);
+            this.metrics.respawns.inc();
+            setTimeout(() => {
+                if (!this.closed) this.workers[slot] = this._spawnWorker(slot);
+            }, this.respawnDelayMs);
+        });
+
+        return worker;
+    }
+
+    _onLine(worker, line) {
+        const observeParse = this.metrics.parse.startTimer();
+        let message;
+        try {
+            message = JSON.parse(line);
+        } catch (error) {
+            console.error("Failed to parse Python response:", line);
+            return;
+        }
+        observeParse();
+
+        // The worker announces itself once its model is loaded
+        if (message.ready && message.id === null) {
+            worker.ready = true;
+            worker.observeReady();
+            return;
+        }
+
+        const entry = worker.pending.get(message.id);
+        if (!entry) return;
+
+        worker.pending.delete(message.id);
+        clearTimeout(entry.timer);
+        delete message.id;
+        if (entry.observe) entry.observe(message.error ? 'error' : 'ok');
+        entry.resolve(message);
+    }
+
+    _failPending(worker, error) {
+        for (const entry of worker.pending.values()) {
+            clearTimeout(entry.timer);
+            if (entry.observe) entry.observe('failed');
+            entry.reject(error);
+        }
+        worker.pending.clear();
+    }
+
+    _pickWorker() {
+        // Least outstanding requests wins
+        let best = null;
+        for (const worker of this.workers) {
+            if (!worker.proc.stdin.writable) continue;
+            if (!best || worker.pending.size < best.pending.size) best = worker;
+        }
+        return best;
+    }
+
+    _send(worker, payload, observe = null) {
+        return new Promise((resolve, reject) => {
+            const id = this.nextId++;
+            const timer = setTimeout(() => {
+                worker.pending.delete(id);
+                if (observe) observe('timeout');
+                reject(new Error(`Prediction timed out after ${this.timeoutMs}ms`));
+            }, this.timeoutMs);
+
+            worker.pending.set(id, { resolve, reject, timer, observe });
+            worker.proc.stdin.write(JSON.stringify({ id, ...payload }) + '\n');
+        });
+    }
+
+    _dispatch(payload, count = 1) {
+        const worker = this._pickWorker();
+        if (!worker) {
+            this.metrics.requests.inc({ outcome: 'unavailable' }, count);
+            return Promise.reject(new Error('No predictor workers available'));
+        }
+
+        const observeRoundtrip = this.metrics.roundtrip.startTimer();
+        return this._send(worker, payload, (outcome) => {
+            observeRoundtrip({ outcome });
+            this.metrics.requests.inc({ outcome }, count);
+        });
+    }
+
+    predict(payload) {
+        return this._dispatch(payload);
+    }
+
+    // Scores all items in one worker round trip; resolves with
+    // { results: [...] } in item order (see microBatcher.js)
+    predictBatch(items) {
+        return this._dispatch({ cmd: 'batch', items }, items.length);
+    }
+
+    // Metric families of every live worker (see ml-engine/src/metrics.py),
+    // as [{ worker, metrics }]; workers that fail to answer are left out
+    async workerMetrics() {
+        const live = this.workers.filter((worker) => worker.proc.stdin.writable);
+        const results = await Promise.allSettled(live.map((worker) => this._send(worker, { cmd: 'metrics' })));
+        return results
+            .map((result, i) => ({ worker: String(live[i].slot), result }))
+            .filter(({ result }) => result.status === 'fulfilled' && result.value.metrics)
+            .map(({ worker, result }) => ({ worker, metrics: result.value.metrics }));
+    }
+
+    close() {
+        this.closed = true;
+        for (const worker of this.workers) {
+            this._failPending(worker, new Error('Predictor pool closed'));
+            worker.proc.kill();
+        }
+    }
+}
+
+module.exports = { PredictorPool };
@@ -1,75 +1,103 @@
+import argparse
 import pandas as pd
 import numpy as np
 import os
-import random
+
+from tables import FORMATS, FUNDING_DTYPES, TableWriter, read_table, with_format
 
 # --- CONFIG ---
 REAL_DATA_PATH = '../data/cleaned_data.csv'
 OUTPUT_PATH = '../data/augmented_data.csv'
+SYNTHETIC_ROWS = 2000
+SEED = 42
+# Random valuation between $5k and $25k
+AMOUNT_RANGE = (5000, 25000)
+
+# "Small Business" Templates
+BAD_IDEA_KEYWORDS = [
+    "lemonade stand", "local bakery", "dog walking service", "home cleaning",
+    "freelance consulting", "math tutoring", "selling cookies", "knitting store",
+    "personal blog", "gaming youtube channel", "lawn mowing", "car wash",
+    "babysitting app", "handmade jewelry", "t-shirt printing", "grocery store",
+    "coffee shop", "barber shop", "nail salon", "handyman service",
+    "street food stall", "used book store", "flower shop", "pet sitting"
+]
+
+def generate_synthetic(n_rows, industries, cities, rng, keywords=BAD_IDEA_KEYWORDS, amount_range=AMOUNT_RANGE):
+    # Every column is drawn in one array operation (index draws + fancy
+    # indexing into object arrays) instead of one Python call per row.
+    # Metadata uses REAL categories, which prevents the model from
+    # associating "Logistics" with "Bad"
+    keywords = np.asarray(keywords, dtype=object)
+    industries = np.asarray(industries, dtype=object)
+    cities = np.asarray(cities, dtype=object)
+    return pd.DataFrame({
+        'pitch': keywords[rng.integers(0, len(keywords), n_rows)],
+        'industry': industries[rng.integers(0, len(industries), n_rows)],
+        'city': cities[rng.integers(0, len(cities), n_rows)],
+        'funding_amount': rng.integers(amount_range[0], amount_range[1], n_rows),
+    })
 
-def augment_data():
+def augment_data(input_file=None, output_file=None, n_rows=None, ratio=None, seed=SEED, chunk_size=None, fmt='csv'):
+    # n_rows synthetic rows (or ratio x the number of real rows) are mixed
+    # into the real data. With chunk_size, the synthetic rows are generated
+    # and written chunk by chunk, so memory stays bounded by the chunk size;
+    # real rows are spread over the chunks at random and each chunk is shuffled.
+    # fmt picks the default input/output files (.csv, .parquet or .feather)
     print("🧪 Generating Smarter Synthetic Negative Data...")
-    
+
     # 1. Load Real Data
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    input_file = os.path.join(base_dir, REAL_DATA_PATH)
-    
+    input_file = input_file or with_format(os.path.join(base_dir, REAL_DATA_PATH), fmt)
+    output_file = output_file or with_format(os.path.join(base_dir, OUTPUT_PATH), fmt)
+
     if not os.path.exists(input_file):
         print("❌ Error: Cleaned data not found.")
         return
 
-    df_real = pd.read_csv(input_file)
-    
+    df_real = read_table(input_file, categorical=False)
+
     # Capture the unique lists of real locations/industries
-    real_industries = df_real['industry'].dropna().unique().tolist()
-    real_cities = df_real['city'].dropna().unique().tolist()
-    
+    real_industries = df_real['industry'].dropna().unique()
+    real_cities = df_real['city'].dropna().unique()
+
     print(f"   Loaded {len(df_real)} real high-value startups.")
 
-    # 2. Define "Small Business" Templates
-    bad_idea_keywords = [
-        "lemonade stand", "local bakery", "dog walking service", "home cleaning", 
-        "freelance consulting", "math tutoring", "selling cookies", "knitting store",
-        "personal blog", "gaming youtube channel", "lawn mowing", "car wash",
-        "babysitting app", "handmade jewelry", "t-shirt printing", "grocery store",
-        "coffee shop", "barber shop", "nail salon", "handyman service",
-        "street food stall", "used book store", "flower shop", "pet sitting"
-    ]
-
-    # 3. Generate 2000 "Bad" Rows
-    synthetic_data = []
-    
-    for i in range(2000): 
-        # Pick a random "bad" description
-        pitch_base = random.choice(bad_idea_keywords)
-        
-        # Randomize metadata using REAL categories
-        # This prevents the model from associating "Logistics" with "Bad"
-        rand_industry = random.choice(real_industries)
-        rand_city = random.choice(real_cities)
-        
-        synthetic_data.append({
-            'pitch': pitch_base,
-            'industry': rand_industry,
-            'city': rand_city,
-            # Random valuation between $5k and $25k
-            'funding_amount': np.random.randint(5000, 25000) 
-        })
-
-    df_synthetic = pd.DataFrame(synthetic_data)
-    print(f"   Created {len(df_synthetic)} synthetic low-value rows.")
-
-    # 4. Combine Real + Synthetic
-    df_final = pd.concat([df_real, df_synthetic], ignore_index=True)
-    
-    # Shuffle
-    df_final = df_final.sample(frac=1, random_state=42).reset_index(drop=True)
-
-    # 5. Save
-    output_file = os.path.join(base_dir, OUTPUT_PATH)
-    df_final.to_csv(output_file, index=False)
+    # 2. Decide how many "Bad" rows to generate
+    if ratio is not None:
+        n_rows = int(round(ratio * len(df_real)))
+    elif n_rows is None:
+        n_rows = SYNTHETIC_ROWS
+
+    rng = np.random.default_rng(seed)
+    chunk_size = chunk_size or max(n_rows, 1)
+    n_chunks = max(-(-n_rows // chunk_size), 1)
+
+    # Assign every real row to a chunk so they are mixed throughout the file
+    real_chunk = rng.integers(0, n_chunks, len(df_real))
+
+    # 3. Generate, Combine, Shuffle and Save chunk by chunk
+    with TableWriter(output_file, FUNDING_DTYPES) as writer:
+        for i in range(n_chunks):
+            size = min(chunk_size, n_rows - i * chunk_size)
+            df_synthetic = generate_synthetic(size, real_industries, real_cities, rng)
+            df_chunk = pd.concat([df_real[real_chunk == i], df_synthetic], ignore_index=True)
+            writer.write(df_chunk.iloc[rng.permutation(len(df_chunk))])
+    total = writer.rows
+
+    print(f"   Created {n_rows} synthetic low-value rows.")
     print(f"✅ Saved Smarter Augmented Dataset to: {output_file}")
-    print(f"   Total Training Rows: {len(df_final)}")
+    print(f"   Total Training Rows: {total}")
 
 if __name__ == "__main__":
-    augment_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Mix synthetic low-value startups into the cleaned data")
+    parser.add_argument('--input', default=None)
+    parser.add_argument('--output', default=None, help="Output file (.csv, .parquet or .feather)")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Format of the default input/output files")
+    parser.add_argument('--rows', type=int, default=None, help=f"Synthetic rows to generate (default {SYNTHETIC_ROWS})")
+    parser.add_argument('--ratio', type=float, default=None, help="Synthetic rows per real row (overrides --rows)")
+    parser.add_argument('--seed', type=int, default=SEED)
+    parser.add_argument('--chunk-size', type=int, default=None, help="Generate and write this many synthetic rows at a time")
+    args = parser.parse_args()
+
+    augment_data(args.input, args.output, args.rows, args.ratio, args.seed, args.chunk_size, args.format)
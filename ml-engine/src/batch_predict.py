@@ -0,0 +1,147 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from predict import load_model, predict_batch
+
+# --- CONFIG ---
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_FILL = 'Unknown'
+
+def detect_format(path):
+    if path != '-' and os.path.splitext(path)[1].lower() in ('.jsonl', '.json', '.ndjson'):
+        return 'jsonl'
+    return 'csv'
+
+def read_chunks(source, fmt, chunk_size):
+    # Both readers return an iterator of DataFrames, so memory is bounded
+    # by the chunk size rather than the size of the input
+    if fmt == 'jsonl':
+        return pd.read_json(source, lines=True, chunksize=chunk_size)
+    return pd.read_csv(source, chunksize=chunk_size)
+
+def prepare_features(chunk, pitch_col, industry_col, city_col, fill_value=DEFAULT_FILL):
+    # Map arbitrary input columns onto the training schema. Sources such as
+    # scraper/data/startups.csv have no industry/city, so fall back to a
+    # constant that the encoder treats as an unknown category.
+    def column(name, default):
+        if name in chunk.columns:
+            return chunk[name].fillna(default).astype(str)
+        return pd.Series(default, index=chunk.index)
+
+    return pd.DataFrame({
+        'pitch': column(pitch_col, ''),
+        'industry': column(industry_col, fill_value),
+        'city': column(city_col, fill_value)
+    }, index=chunk.index)
+
+def score_chunk(chunk, pitch_col='pitch', industry_col='industry', city_col='city'):
+    features = prepare_features(chunk, pitch_col, industry_col, city_col)
+    predictions = predict_batch(features)
+    # Re-scoring an already scored file replaces the old predictions
+    chunk = chunk.drop(columns=predictions.columns, errors='ignore')
+    return pd.concat([chunk, predictions], axis=1)
+
+def score_chunks(chunks, pitch_col='pitch', industry_col='industry', city_col='city'):
+    for chunk in chunks:
+        yield score_chunk(chunk, pitch_col, industry_col, city_col)
+
+def _init_worker():
+    # With fork the model loaded by the parent is inherited copy-on-write and
+    # this is a no-op; with spawn it is loaded here (the compact artifact is
+    # memory-mapped, so all workers still share one copy of its pages)
+    model = load_model()
+    if hasattr(model, 'named_steps'):
+        # One process per core already; the sklearn forest must not start
+        # a thread per core on top of that
+        model.named_steps['regressor'].set_params(n_jobs=1)
+
+def score_chunks_parallel(chunks, workers, pitch_col='pitch', industry_col='industry', city_col='city'):
+    # Each chunk is split into one shard per worker and the shards are
+    # scored by a process pool. At most 2 x workers shards are in flight,
+    # so memory stays bounded, and results are yielded in input order.
+    # fork only on Linux: on macOS it is unsafe once system frameworks are
+    # loaded (CPython defaults to spawn there for that reason)
+    method = 'fork' if sys.platform.startswith('linux') else 'spawn'
+    if method == 'fork':
+        load_model()  # before the workers are forked
+    context = multiprocessing.get_context(method)
+
+    pending = deque()
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        for chunk in chunks:
+            for start, end in shard_bounds(len(chunk), workers):
+                shard = chunk.iloc[start:end]
+                pending.append(pool.apply_async(score_chunk, (shard, pitch_col, industry_col, city_col)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+def shard_bounds(n_rows, n_shards):
+    edges = np.linspace(0, n_rows, min(n_shards, n_rows) + 1).astype(int)
+    return list(zip(edges[:-1], edges[1:]))
+
+def write_chunks(scored_chunks, sink, fmt):
+    total = 0
+    for i, chunk in enumerate(scored_chunks):
+        if fmt == 'jsonl':
+            # Go through plain Python objects so floats keep their shortest
+            # repr and missing values become null
+            records = chunk.astype(object).where(chunk.notna(), None).to_dict(orient='records')
+            sink.write(''.join(json.dumps(record) + '\n' for record in records))
+        else:
+            chunk.to_csv(sink, index=False, header=(i == 0))
+        sink.flush()
+        total += len(chunk)
+        print(f"   Scored {total} rows...", file=sys.stderr)
+    return total
+
+def batch_predict(input_path, output_path='-', chunk_size=DEFAULT_CHUNK_SIZE,
+                  pitch_col='pitch', industry_col='industry', city_col='city',
+                  input_format=None, output_format=None, workers=1):
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path)
+
+    source = sys.stdin if input_path == '-' else input_path
+    chunks = read_chunks(source, input_format, chunk_size)
+    if workers > 1:
+        scored = score_chunks_parallel(chunks, workers, pitch_col, industry_col, city_col)
+    else:
+        scored = score_chunks(chunks, pitch_col, industry_col, city_col)
+
+    if output_path == '-':
+        return write_chunks(scored, sys.stdout, output_format)
+    with open(output_path, 'w', newline='') as sink:
+        return write_chunks(scored, sink, output_format)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/JSONL file of startup pitches in bulk.")
+    parser.add_argument('input', help="Input CSV or JSONL file, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='-', help="Output file (default: stdout)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--pitch-col', default='pitch')
+    parser.add_argument('--industry-col', default='industry')
+    parser.add_argument('--city-col', default='city')
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--output-format', choices=['csv', 'jsonl'])
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Score shards in this many processes (0 = one per core)")
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    print(f"🧮 Batch scoring {args.input}...", file=sys.stderr)
+    total = batch_predict(args.input, args.output, args.chunk_size,
+                          args.pitch_col, args.industry_col, args.city_col,
+                          args.input_format, args.output_format, workers)
+    print(f"✅ Scored {total} rows.", file=sys.stderr)
+
+if __name__ == "__main__":
+    # Usage: python batch_predict.py ../../scraper/data/startups.csv --pitch-col description -o scored.csv
+    main()
@@ -0,0 +1,418 @@
+"""
+Latency / throughput benchmark suite for the analyze path.
+
+Sections (--suite, default: cold warm):
+- cold : fresh Python process per run, as for a new backend worker, per
+         engine. Stages: process spawn (interpreter start), `import predict`,
+         model load (joblib.load or mapping the artifact), feature transform,
+         model predict, first full predict() call; wall-time percentiles and
+         peak RSS of the child.
+- warm : predict.predict() inside one long-lived process, per engine:
+         latency percentiles for cache misses (distinct inputs) and hits.
+- http : POST /api/analyze from a local load generator (keep-alive
+         connections, --concurrency workers): latency of the first request
+         after start-up (cold), then percentiles and requests/sec under
+         load. Targets --url, or starts backend/src/index.js itself with
+         --start-backend (needs node and the backend's npm dependencies)
+         and then also reports the peak RSS of the server and its workers.
+
+The report is JSON (--output). With --baseline, key metrics are compared
+to an earlier report and the exit status is non-zero if any got slower
+than --tolerance allows, so the suite can gate a deploy.
+
+Usage: python benchmark.py [--suite cold warm http] [--repeat 5]
+                           [--requests 200] [--concurrency 8]
+                           [--start-backend | --url http://localhost:3000]
+                           [--output report.json] [--baseline old.json]
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+ENGINES = ('compact', 'sklearn')
+SUITES = ('cold', 'warm', 'http')
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(SRC_DIR, '..', '..'))
+DATA_PATH = os.path.join(SRC_DIR, '../data/cleaned_data.csv')
+BACKEND_SCRIPT = os.path.join(REPO_DIR, 'backend/src/index.js')
+
+SAMPLE_REQUEST = ('ai powered supply chain management on blockchain', 'Technology', 'Bengaluru')
+
+
+def percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def rank(q):
+        # Nearest-rank percentile
+        return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+    return {
+        'n': len(ordered),
+        'mean': round(statistics.mean(ordered), 3),
+        'p50': round(rank(50), 3),
+        'p95': round(rank(95), 3),
+        'p99': round(rank(99), 3),
+        'max': round(ordered[-1], 3),
+    }
+
+
+def sample_requests(n, seed=42):
+    # Distinct, realistic inputs taken from the cleaned training data
+    with open(DATA_PATH, newline='') as f:
+        rows = [(r['pitch'], r['industry'], r['city']) for r in csv.DictReader(f)]
+    rows = list(dict.fromkeys(rows))
+    random.Random(seed).shuffle(rows)
+    return (rows * (n // max(len(rows), 1) + 1))[:n]
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# --- Child processes (run as `python -c "import benchmark; ..."`) ---
+
+def stage_timings(model, pitch, industry, city):
+    # Transform and predict separately, on whichever engine predict.py loaded
+    from compact_model import CompactModel
+
+    start = time.perf_counter()
+    if isinstance(model, CompactModel):
+        X = model.transform([pitch], [industry], [city])
+        transformed = time.perf_counter()
+        model.predict_features(X)
+    else:
+        import pandas as pd
+        X = model.named_steps['preprocessor'].transform(
+            pd.DataFrame({'pitch': [pitch], 'industry': [industry], 'city': [city]}))
+        transformed = time.perf_counter()
+        model.named_steps['regressor'].predict(X)
+    predicted = time.perf_counter()
+    return (transformed - start) * 1000, (predicted - transformed) * 1000
+
+
+def child_cold():
+    started_at = time.time()
+    start = time.perf_counter()
+    import predict
+    imported = time.perf_counter()
+    model = predict.load_model()
+    loaded = time.perf_counter()
+    transform_ms, predict_ms = stage_timings(model, *SAMPLE_REQUEST)
+    staged = time.perf_counter()
+    result = predict.predict(*SAMPLE_REQUEST)
+    requested = time.perf_counter()
+    print(json.dumps({
+        'started_at': started_at,
+        'import_ms': (imported - start) * 1000,
+        'load_ms': (loaded - imported) * 1000,
+        'transform_ms': transform_ms,
+        'predict_ms': predict_ms,
+        'request_ms': (requested - staged) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+        'engine': predict._model_version[0] if predict._model_version else None,
+        'prediction': result.get('predicted_valuation'),
+    }))
+
+
+def child_warm(n):
+    import predict
+    predict.load_model()
+    requests = sample_requests(n)
+    for request in requests[:5]:
+        predict.predict(*request)
+
+    predict._cache.clear()
+    misses = []
+    for request in requests:
+        start = time.perf_counter()
+        predict.predict(*request)
+        misses.append((time.perf_counter() - start) * 1000)
+
+    hits = []
+    for request in requests:
+        start = time.perf_counter()
+        predict.predict(*request)
+        hits.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        'engine': predict._model_version[0] if predict._model_version else None,
+        'miss_ms': misses,
+        'hit_ms': hits,
+        'peak_rss_mb': peak_rss_mb(),
+    }))
+
+
+def _run_child(engine, code):
+    env = {**os.environ, 'PREDICTOR_ENGINE': engine}
+    spawned_at = time.time()
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', f"import benchmark; benchmark.{code}"], cwd=SRC_DIR, env=env,
+                         capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return spawned_at, wall_ms, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# --- Sections ---
+
+def bench_cold(engine, repeat):
+    runs = []
+    for _ in range(repeat):
+        spawned_at, wall_ms, run = _run_child(engine, 'child_cold()')
+        run['spawn_ms'] = (run.pop('started_at') - spawned_at) * 1000
+        run['wall_ms'] = wall_ms
+        runs.append(run)
+
+    report = {'engine': runs[0]['engine'], 'prediction': runs[0]['prediction'],
+              'wall_ms': percentiles([r['wall_ms'] for r in runs])}
+    for stage in ('spawn_ms', 'import_ms', 'load_ms', 'transform_ms', 'predict_ms', 'request_ms', 'peak_rss_mb'):
+        report[stage] = round(statistics.median(r[stage] for r in runs), 3)
+    return report
+
+
+def bench_warm(engine, n):
+    _, _, run = _run_child(engine, f'child_warm({n})')
+    return {
+        'engine': run['engine'],
+        'miss_ms': percentiles(run['miss_ms']),
+        'hit_ms': percentiles(run['hit_ms']),
+        'peak_rss_mb': round(run['peak_rss_mb'], 3),
+    }
+
+
+class LoadGenerator:
+    """
+    Fires JSON POSTs at one endpoint from a thread pool, one keep-alive
+    connection per thread.
+    """
+
+    def __init__(self, url, path='/api/analyze', timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'conn', None) is None:
+            self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._local.conn
+
+    def post(self, payload):
+        body = json.dumps(payload)
+        start = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request('POST', self.path, body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            self._local.conn = None
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    def run(self, payloads, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(self.post, payloads))
+        elapsed = time.perf_counter() - start
+        latencies = [ms for ms, ok in results if ok]
+        return {
+            'requests': len(results),
+            'errors': sum(1 for _, ok in results if not ok),
+            'concurrency': concurrency,
+            'seconds': round(elapsed, 3),
+            'requests_per_sec': round(len(latencies) / elapsed, 2) if elapsed else None,
+            'latency_ms': percentiles(latencies),
+        }
+
+
+def _payload(request):
+    pitch, industry, city = request
+    return {'idea': pitch, 'industry': industry, 'city': city}
+
+
+def wait_for_server(url, timeout=30):
+    parts = urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=1)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def process_tree_rss_mb(pid):
+    # Peak RSS (VmHWM) of a process and its direct children; Linux only
+    def vm_hwm(p):
+        try:
+            with open(f'/proc/{p}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        return None
+    return {'server': vm_hwm(pid), 'workers': [vm_hwm(c) for c in children]}
+
+
+def start_backend(port, workers):
+    env = {**os.environ, 'PORT': str(port), 'PREDICTOR_PYTHON': sys.executable,
+           'PREDICTOR_WORKERS': str(workers)}
+    return subprocess.Popen(['node', BACKEND_SCRIPT], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def bench_http(url, n_requests, concurrency, server=None):
+    generator = LoadGenerator(url)
+    requests = [_payload(r) for r in sample_requests(n_requests + 1)]
+
+    # The first request after start-up waits for the workers to load the model
+    cold_ms, cold_ok = generator.post(requests[0])
+    report = {'url': url, 'cold_ms': round(cold_ms, 3) if cold_ok else None}
+
+    generator.run(requests[1:1 + concurrency * 2], concurrency)  # warm-up
+    report['load'] = generator.run(requests[1:], concurrency)
+    if server is not None:
+        report['peak_rss_mb'] = process_tree_rss_mb(server.pid)
+    return report
+
+
+# --- Report ---
+
+def gated_metrics(report):
+    # The metrics --baseline compares: {name: (value, higher is better)}
+    values = {}
+    for engine, r in report.get('cold', {}).items():
+        values[f'cold.{engine}.wall_ms.p50'] = (r['wall_ms']['p50'], False)
+    for engine, r in report.get('warm', {}).items():
+        values[f'warm.{engine}.miss_ms.p50'] = (r['miss_ms']['p50'], False)
+        values[f'warm.{engine}.hit_ms.p50'] = (r['hit_ms']['p50'], False)
+    load = report.get('http', {}).get('load')
+    if load and load['latency_ms']:
+        values['http.load.latency_ms.p95'] = (load['latency_ms']['p95'], False)
+        values['http.load.requests_per_sec'] = (load['requests_per_sec'], True)
+    return values
+
+
+def compare(report, baseline, tolerance):
+    """
+    Returns a list of (metric, baseline value, current value) that regressed
+    by more than tolerance (a fraction, 0.25 = 25% slower).
+    """
+    current = gated_metrics(report)
+    regressions = []
+    for name, (old, higher_is_better) in gated_metrics(baseline).items():
+        if name not in current or not old:
+            continue
+        new = current[name][0]
+        change = (old - new) / old if higher_is_better else (new - old) / old
+        if change > tolerance:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analyze path (predict.py and POST /api/analyze).")
+    parser.add_argument('--suite', nargs='+', choices=SUITES, default=['cold', 'warm'])
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--repeat', type=int, default=5, help="Cold runs per engine")
+    parser.add_argument('--calls', type=int, default=200, help="Warm predict() calls per engine")
+    parser.add_argument('--requests', type=int, default=200, help="HTTP requests under load")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--url', default=None, help="Running backend to load-test")
+    parser.add_argument('--start-backend', action='store_true', help="Start backend/src/index.js for the http suite")
+    parser.add_argument('--port', type=int, default=3901, help="Port for --start-backend")
+    parser.add_argument('--workers', type=int, default=2, help="PREDICTOR_WORKERS for --start-backend")
+    parser.add_argument('--output', default=None, help="Write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', default=None, help="Earlier report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        }
+    }
+
+    if 'cold' in args.suite:
+        report['cold'] = {engine: bench_cold(engine, args.repeat) for engine in args.engines}
+        print(f"cold: " + ", ".join(f"{e} p50 {r['wall_ms']['p50']:.0f}ms" for e, r in report['cold'].items()),
+              file=sys.stderr)
+    if 'warm' in args.suite:
+        report['warm'] = {engine: bench_warm(engine, args.calls) for engine in args.engines}
+        print(f"warm: " + ", ".join(f"{e} miss p50 {r['miss_ms']['p50']:.2f}ms hit p50 {r['hit_ms']['p50']:.3f}ms"
+                                     for e, r in report['warm'].items()), file=sys.stderr)
+    if 'http' in args.suite:
+        server = None
+        url = args.url
+        if args.start_backend:
+            url = f"http://127.0.0.1:{args.port}"
+            server = start_backend(args.port, args.workers)
+        try:
+            if not url or not wait_for_server(url):
+                report['http'] = {'error': f"backend not reachable at {url}" if url else "no --url / --start-backend"}
+            else:
+                report['http'] = bench_http(url, args.requests, args.concurrency, server)
+                load = report['http']['load']
+                print(f"http: {load['requests_per_sec']} req/s, p95 {load['latency_ms'] and load['latency_ms']['p95']}ms, "
+                      f"{load['errors']} errors", file=sys.stderr)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report['regressions'] = [{'metric': m, 'baseline': old, 'current': new} for m, old, new in regressions]
+        for m, old, new in regressions:
+            print(f"REGRESSION {m}: {old} -> {new}", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    # Engines must agree on the prediction, so this doubles as a smoke test
+    predictions = {r['prediction'] for r in report.get('cold', {}).values()}
+    if None in predictions or len(predictions) > 1:
+        print(f"Engines disagree or failed: {predictions}", file=sys.stderr)
+        status = 1
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
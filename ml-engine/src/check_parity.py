@@ -0,0 +1,60 @@
+"""
+Parity check: the compact NumPy engine must reproduce the sklearn Pipeline.
+
+Scores the training data plus a few edge cases (empty / stop-word-only
+pitches, repeated and mixed-case tokens, unknown or missing categories) with
+both the pickled Pipeline and the exported artifact, and compares the raw
+log-scale predictions. The forest is run with n_jobs=1 so that sklearn sums
+the trees in order, which makes the expected result exactly identical.
+
+Usage: python check_parity.py [--data ../data/augmented_data.csv] [--export]
+Exits non-zero on any mismatch.
+"""
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from compact_model import CompactModel
+from model_artifact import export_artifact
+
+EDGE_CASES = pd.DataFrame({
+    'pitch': ['', 'the and of it', 'AI ai Ai platform PLATFORM for the b2b b2b',
+              'café über naïve', 'a b c', 'fintech ' * 50],
+    'industry': ['Technology', 'not an industry', 'Consumer Internet', None, 'E-Commerce', 'FinTech'],
+    'city': ['Bengaluru', 'Atlantis', None, 'Mumbai', 'Bangalore', 'New Delhi'],
+})
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Check the compact engine against the sklearn Pipeline.")
+    parser.add_argument('--model', default=os.path.join(base_dir, '../models/valuation_model.pkl'))
+    parser.add_argument('--artifact', default=os.path.join(base_dir, '../models/valuation_model.bin'))
+    parser.add_argument('--data', default=os.path.join(base_dir, '../data/augmented_data.csv'))
+    parser.add_argument('--export', action='store_true', help="Re-export the artifact from the pickle first")
+    args = parser.parse_args(argv)
+
+    pipeline = joblib.load(args.model)
+    if args.export:
+        export_artifact(pipeline, args.artifact)
+    pipeline.named_steps['regressor'].n_jobs = 1
+    compact = CompactModel(args.artifact)
+
+    inputs = pd.concat([pd.read_csv(args.data)[['pitch', 'industry', 'city']], EDGE_CASES], ignore_index=True)
+    expected = pipeline.predict(inputs)
+    actual = compact.predict(inputs['pitch'].tolist(), inputs['industry'].tolist(), inputs['city'].tolist())
+
+    mismatched = np.flatnonzero(expected != actual)
+    print(f"Compared {len(inputs)} rows: {len(mismatched)} mismatches, "
+          f"max |diff| {np.max(np.abs(expected - actual)):.3g} (log scale)")
+    for i in mismatched[:5]:
+        print(f"   row {i}: {inputs.iloc[i].to_dict()} sklearn={expected[i]!r} compact={actual[i]!r}")
+    return 1 if len(mismatched) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
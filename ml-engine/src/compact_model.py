@@ -0,0 +1,196 @@
+"""
+Pure-NumPy evaluator for the artifact written by model_artifact.py.
+
+Reproduces the sklearn Pipeline step by step without importing pandas or
+scikit-learn:
+- TfidfVectorizer: lowercase, token_pattern, stop words, word n-grams,
+  counts * idf, then row normalization (same summation order as sklearn)
+- OneHotEncoder(handle_unknown='ignore'): dict lookup per column
+- RandomForestRegressor: all (row, tree) pairs walked level by level at
+  once, then averaged in tree order
+
+check_parity.py compares its predictions with the pickled Pipeline.
+"""
+import re
+
+import numpy as np
+
+from model_artifact import read_artifact, unpack_strings
+
+# Rows per dense feature block (rows x n_features float32)
+BLOCK_ROWS = 1024
+
+
+class TextVectorizer:
+    """
+    TfidfVectorizer.transform from the exported settings (model_artifact.
+    export_text): text is the settings dict, arrays holds vocab_data,
+    vocab_offsets and idf.
+    """
+
+    def __init__(self, text, arrays):
+        self.n_features = text['n_features']
+        self._lowercase = text['lowercase']
+        self._token_re = re.compile(text['token_pattern'])
+        self._stop_words = frozenset(text['stop_words'])
+        self._ngram_range = tuple(text['ngram_range'])
+        self._binary = text['binary']
+        self._sublinear_tf = text['sublinear_tf']
+        self._norm = text['norm']
+        self._idf = arrays.get('idf')
+        self.vocabulary = {term: i for i, term in
+                           enumerate(unpack_strings(arrays['vocab_data'], arrays['vocab_offsets']))}
+
+    def analyze(self, doc):
+        if self._lowercase:
+            doc = doc.lower()
+        tokens = [t for t in self._token_re.findall(doc) if t not in self._stop_words]
+
+        # Same n-gram order as sklearn's _word_ngrams
+        min_n, max_n = self._ngram_range
+        if max_n == 1:
+            return tokens
+        grams = list(tokens) if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            grams.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return grams
+
+    def transform(self, docs):
+        """
+        Sparse TF-IDF rows as (row, column, value) arrays, columns sorted
+        within each row.
+        """
+        rows, cols, counts = [], [], []
+        for r, doc in enumerate(docs):
+            row_counts = {}
+            for gram in self.analyze(doc):
+                j = self.vocabulary.get(gram)
+                if j is not None:
+                    row_counts[j] = row_counts.get(j, 0) + 1
+            for j in sorted(row_counts):
+                rows.append(r)
+                cols.append(j)
+                counts.append(row_counts[j])
+
+        rows = np.asarray(rows, dtype=np.intp)
+        cols = np.asarray(cols, dtype=np.intp)
+        values = np.asarray(counts, dtype=np.float64)
+        if not rows.size:
+            return rows, cols, values
+        if self._binary:
+            values[:] = 1.0
+        if self._sublinear_tf:
+            values = np.log(values) + 1.0
+        if self._idf is not None:
+            values *= self._idf[cols]
+
+        if self._norm in ('l1', 'l2'):
+            # Accumulate each row left to right like sklearn's
+            # inplace_csr_row_normalize_*, so the result is bit-identical
+            terms = values * values if self._norm == 'l2' else np.abs(values)
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            lengths = np.diff(np.r_[starts, len(rows)])
+            norms = np.zeros(len(starts))
+            for k in range(lengths.max()):
+                has_k = lengths > k
+                norms[has_k] += terms[starts[has_k] + k]
+            if self._norm == 'l2':
+                norms = np.sqrt(norms)
+            norms[norms == 0] = 1.0
+            values /= np.repeat(norms, lengths)
+        return rows, cols, values
+
+
+class CompactModel:
+
+    def __init__(self, path, mmap=True):
+        meta, arrays = read_artifact(path, mmap=mmap)
+        self.meta = meta
+        self.text_column = meta['text_column']
+        self.n_features = meta['n_features']
+
+        text = meta['text']
+        self._text = TextVectorizer(text, arrays)
+
+        # (column, {category: feature index}, feature index of NaN or None)
+        self._categorical = []
+        self.categories = []
+        offset = text['n_features']
+        for i, spec in enumerate(meta['categorical']):
+            values = unpack_strings(arrays[f'cat{i}_data'], arrays[f'cat{i}_offsets'])
+            lookup = {v: offset + j for j, v in enumerate(values)}
+            nan_index = offset + spec['nan_index'] if spec['nan_index'] >= 0 else None
+            self._categorical.append((spec['column'], lookup, nan_index))
+            self.categories.append(values)
+            offset += spec['n_features']
+
+        forest = meta['forest']
+        self._n_trees = forest['n_trees']
+        self._max_depth = forest['max_depth']
+        self._roots = arrays['tree_roots']
+        self._left = arrays['node_left']
+        self._right = arrays['node_right']
+        self._feature = arrays['node_feature']
+        self._threshold = arrays['node_threshold']
+        self._value = arrays['node_value']
+
+    # --- One-hot ---
+
+    def _one_hot(self, column_values, X):
+        for values, (_, lookup, nan_index) in zip(column_values, self._categorical):
+            for r, value in enumerate(values):
+                if isinstance(value, str):
+                    j = lookup.get(value)
+                else:
+                    j = nan_index if value is None or value != value else lookup.get(str(value))
+                if j is not None:
+                    X[r, j] = 1.0
+
+    def transform(self, pitches, *categoricals):
+        """
+        Dense float32 feature matrix, as the forest sees it (sklearn casts
+        the Pipeline's float64 features to float32 before the trees).
+        """
+        X64 = np.zeros((len(pitches), self.n_features), dtype=np.float64)
+        rows, cols, values = self._text.transform(pitches)
+        X64[rows, cols] = values
+        self._one_hot(categoricals, X64)
+        return X64.astype(np.float32)
+
+    # --- Forest ---
+
+    def predict_features(self, X):
+        # One (row, tree) cursor per pair, advanced one level at a time;
+        # pairs that reached a leaf (self-pointing) drop out of the loop
+        n = len(X)
+        flat = X.ravel()
+        nodes = np.tile(self._roots.astype(np.intp), n)
+        row_base = np.repeat(np.arange(n, dtype=np.intp) * X.shape[1], self._n_trees)
+        active = np.arange(len(nodes))
+        for _ in range(self._max_depth):
+            current = nodes[active]
+            go_left = flat[row_base[active] + self._feature[current]] <= self._threshold[current]
+            following = np.where(go_left, self._left[current], self._right[current])
+            nodes[active] = following
+            active = active[following != current]
+            if not active.size:
+                break
+
+        leaf_values = self._value[nodes].reshape(n, self._n_trees)
+        total = np.zeros(n)
+        for t in range(self._n_trees):
+            total += leaf_values[:, t]
+        return total / self._n_trees
+
+    def predict(self, pitches, *categoricals):
+        """
+        Predictions (log1p of the funding amount, like the Pipeline) for
+        parallel sequences of pitches and categorical values
+        (industries, cities).
+        """
+        out = np.empty(len(pitches))
+        for start in range(0, len(pitches), BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            X = self.transform(pitches[block], *(values[block] for values in categoricals))
+            out[block] = self.predict_features(X)
+        return out
@@ -0,0 +1,162 @@
+"""
+Feature store for train_valuation.py.
+
+Fitting the TF-IDF + one-hot ColumnTransformer is the same work on every
+training run as long as the data and vectorizer settings do not change.
+This stage persists its output under a fingerprint of:
+- the content of the training CSV (sha256)
+- the preprocessor configuration (every non-estimator parameter)
+- the train/test split, and the scikit-learn version
+
+Each entry is a directory holding the fitted preprocessor (joblib), the
+train/test matrices as sparse .npz and the targets, written to a temp
+directory and renamed into place. A later run with the same fingerprint
+loads it and only pays for the regressor fit.
+"""
+import hashlib
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+from sklearn.model_selection import train_test_split
+
+from model_search import FEATURES, build_preprocessor
+from tables import read_table
+
+CACHE_DIR = '../data/.feature_cache'
+# Entries kept after a new one is written (least recently used are removed)
+MAX_ENTRIES = 8
+FORMAT_VERSION = 1
+
+
+def default_cache_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CACHE_DIR)
+
+
+def file_digest(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def preprocessor_config(preprocessor):
+    # Estimator objects are covered by their own (deep) parameters
+    params = preprocessor.get_params(deep=True)
+    return {k: v for k, v in params.items() if k != 'transformers' and not hasattr(v, 'get_params')}
+
+
+def feature_key(data_digest, vectorizer_name, dense=False, test_size=0.2, random_state=42):
+    spec = {
+        'format': FORMAT_VERSION,
+        'data': data_digest,
+        'features': FEATURES,
+        'preprocessor': preprocessor_config(build_preprocessor(vectorizer_name, dense)),
+        'split': [test_size, random_state],
+        'sklearn': sklearn.__version__,
+    }
+    encoded = json.dumps(spec, sort_keys=True, default=repr).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+def fit_features(data_file, vectorizer_name, dense=False, test_size=0.2, random_state=42):
+    df = read_table(data_file, columns=FEATURES + ['funding_amount'])
+    X = df[FEATURES]
+    # --- CRITICAL: THE LOG TRANSFORM TO NORMALIZE ---
+    y = np.log1p(df['funding_amount'])
+
+    # Split for validation
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    preprocessor = build_preprocessor(vectorizer_name, dense)
+    return {
+        'preprocessor': preprocessor,
+        'X_train': preprocessor.fit_transform(X_train),
+        'X_test': preprocessor.transform(X_test),
+        'y_train': y_train.to_numpy(),
+        'y_test': y_test.to_numpy(),
+        'n_rows': len(df),
+    }
+
+
+def save_features(cache_dir, key, features):
+    entry = os.path.join(cache_dir, key)
+    if os.path.isdir(entry):
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+
+    tmp_entry = f"{entry}.tmp-{os.getpid()}"
+    os.makedirs(tmp_entry, exist_ok=True)
+    joblib.dump(features['preprocessor'], os.path.join(tmp_entry, 'preprocessor.joblib'))
+    for name in ('X_train', 'X_test'):
+        sp.save_npz(os.path.join(tmp_entry, f'{name}.npz'), sp.csr_matrix(features[name]))
+    np.savez(os.path.join(tmp_entry, 'targets.npz'), y_train=features['y_train'], y_test=features['y_test'])
+    with open(os.path.join(tmp_entry, 'meta.json'), 'w') as f:
+        json.dump({'n_rows': features['n_rows']}, f)
+
+    try:
+        os.rename(tmp_entry, entry)
+    except OSError:
+        # Another run stored the same entry first
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+
+
+def load_features(cache_dir, key, dense=False):
+    entry = os.path.join(cache_dir, key)
+    if not os.path.isdir(entry):
+        return None
+
+    try:
+        features = {'preprocessor': joblib.load(os.path.join(entry, 'preprocessor.joblib'))}
+        for name in ('X_train', 'X_test'):
+            matrix = sp.load_npz(os.path.join(entry, f'{name}.npz'))
+            features[name] = matrix.toarray() if dense else matrix
+        with np.load(os.path.join(entry, 'targets.npz')) as targets:
+            features['y_train'] = targets['y_train']
+            features['y_test'] = targets['y_test']
+        with open(os.path.join(entry, 'meta.json')) as f:
+            features.update(json.load(f))
+    except (OSError, ValueError, KeyError, EOFError):
+        # Partial or corrupt entry: rebuild it
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    os.utime(entry)
+    return features
+
+
+def prune(cache_dir, keep=MAX_ENTRIES):
+    entries = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if '.tmp-' not in name]
+    entries.sort(key=os.path.getmtime, reverse=True)
+    for entry in entries[keep:]:
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def get_features(data_file, vectorizer_name, dense=False, test_size=0.2, random_state=42,
+                 cache_dir=None, refresh=False):
+    """
+    Returns (features, cached): the fitted preprocessor, train/test matrices
+    and log targets, and whether they came from the store.
+    With cache_dir=False the store is bypassed entirely.
+    """
+    if cache_dir is False:
+        return fit_features(data_file, vectorizer_name, dense, test_size, random_state), False
+
+    cache_dir = cache_dir or default_cache_dir()
+    key = feature_key(file_digest(data_file), vectorizer_name, dense, test_size, random_state)
+    if not refresh:
+        features = load_features(cache_dir, key, dense)
+        if features is not None:
+            return features, True
+
+    features = fit_features(data_file, vectorizer_name, dense, test_size, random_state)
+    if refresh:
+        shutil.rmtree(os.path.join(cache_dir, key), ignore_errors=True)
+    save_features(cache_dir, key, features)
+    prune(cache_dir)
+    return features, False
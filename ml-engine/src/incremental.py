@@ -0,0 +1,100 @@
+"""
+Incremental updates of the valuation model.
+
+A full train_valuation.py run refits the preprocessor and all trees on the
+whole history. An update instead:
+1. hashes the incoming rows and keeps only those the model has not seen
+   (the hashes of trained-on rows are stored next to the model),
+2. transforms them with the model's existing, frozen preprocessor,
+3. grows the RandomForest with warm_start: the new trees are fitted on the
+   new rows only, and their number is proportional to the share of new rows,
+   so the ensemble stays balanced between old and new data,
+4. publishes the pickle, the compact artifact and the row hashes atomically.
+
+The cost scales with the delta instead of the full history. The TF-IDF
+vocabulary and the known categories do not grow, so words or cities that
+appear only in new rows are ignored until the next full retrain; run one
+when the forest has grown large or the data has drifted.
+"""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_search import FEATURES
+
+TARGET = 'funding_amount'
+# Ceiling on the forest size reached through updates; beyond it a full
+# retrain is both cheaper to serve and more accurate
+MAX_TREES = 300
+
+
+def row_hashes(df):
+    return pd.util.hash_pandas_object(df[FEATURES + [TARGET]], index=False).to_numpy()
+
+
+def load_seen_rows(path):
+    if not os.path.exists(path):
+        return None
+    return np.load(path)
+
+
+def save_seen_rows(path, hashes):
+    # np.save only keeps the name as-is when it ends in .npy
+    tmp_path = f"{os.path.splitext(path)[0]}.tmp.npy"
+    np.save(tmp_path, np.unique(hashes))
+    os.replace(tmp_path, path)
+
+
+def select_new_rows(df, seen):
+    """
+    Returns (new rows, their hashes), dropping rows already trained on and
+    repeats within df.
+    """
+    hashes = row_hashes(df)
+    fresh = ~np.isin(hashes, seen) & ~pd.Series(hashes).duplicated().to_numpy()
+    return df[fresh], hashes[fresh]
+
+
+def trees_for_delta(n_trees, n_seen, n_new):
+    return max(1, int(round(n_trees * n_new / max(n_seen, 1))))
+
+
+def extend_forest(model, new_rows, n_seen, max_trees=MAX_TREES):
+    """
+    Adds trees fitted on new_rows to the Pipeline's RandomForest in place.
+    Returns a summary dict; raises ValueError when the model cannot be
+    updated incrementally.
+    """
+    preprocessor = model.named_steps['preprocessor']
+    forest = model.named_steps['regressor']
+    if not hasattr(forest, 'estimators_') or 'warm_start' not in forest.get_params():
+        raise ValueError(f"{type(forest).__name__} cannot be updated incrementally; run a full train")
+
+    old_trees = len(forest.estimators_)
+    added = trees_for_delta(old_trees, n_seen, len(new_rows))
+    if old_trees + added > max_trees:
+        raise ValueError(f"Update would grow the forest to {old_trees + added} trees (max {max_trees}); "
+                         f"run a full train instead")
+
+    X_new = preprocessor.transform(new_rows[FEATURES])
+    # --- CRITICAL: THE LOG TRANSFORM TO NORMALIZE ---
+    y_new = np.log1p(new_rows[TARGET]).to_numpy()
+
+    # How the current model does on data it has not seen yet (drift indicator)
+    mae_before = np.mean(np.abs(np.expm1(forest.predict(X_new)) - np.expm1(y_new)))
+
+    start = time.perf_counter()
+    forest.set_params(warm_start=True, n_estimators=old_trees + added)
+    forest.fit(X_new, y_new)
+    forest.set_params(warm_start=False)
+    fit_s = time.perf_counter() - start
+
+    return {
+        'new_rows': len(new_rows),
+        'trees_before': old_trees,
+        'trees_after': len(forest.estimators_),
+        'fit_s': fit_s,
+        'mae_new_rows_before': mae_before,
+    }
@@ -0,0 +1,111 @@
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds (0.5 ms .. 10 s)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        return {
+            'name': self.name, 'type': 'counter', 'help': self.help,
+            'samples': [{'labels': dict(zip(self.labelnames, key)), 'value': value}
+                        for key, value in self._values.items()]
+        }
+
+class Histogram:
+    """
+    Cumulative-bucket histogram, in the shape Prometheus expects.
+    """
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = _key(self.labelnames, labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series['counts'][i] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        return {
+            'name': self.name, 'type': 'histogram', 'help': self.help,
+            'samples': [{
+                'labels': dict(zip(self.labelnames, key)),
+                'buckets': [[bound, count] for bound, count in zip(self.buckets, series['counts'])],
+                'sum': series['sum'],
+                'count': series['count'],
+            } for key, series in self._series.items()]
+        }
+
+class Gauge:
+    # Value computed on collection: fn() returns [(labels dict, value), ...]
+    def __init__(self, name, help, fn, type='gauge'):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self.type = type
+
+    def collect(self):
+        return {
+            'name': self.name, 'type': self.type, 'help': self.help,
+            'samples': [{'labels': labels, 'value': value} for labels, value in self.fn()]
+        }
+
+class Registry:
+    """
+    In-process metrics of one predict.py process. collect() returns plain
+    JSON-able metric families; the Node backend renders them on /metrics.
+    """
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name, help, fn, type='gauge'):
+        return self.register(Gauge(name, help, fn, type))
+
+    def collect(self):
+        return [metric.collect() for metric in self._metrics]
+
+REGISTRY = Registry()
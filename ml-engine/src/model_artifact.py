@@ -0,0 +1,265 @@
+"""
+Compact, memory-mappable export of the valuation Pipeline.
+
+The pickled Pipeline holds the TF-IDF vocabulary as a Python dict and every
+tree as its own object, so joblib.load has to rebuild all of it in each
+process. The artifact instead stores the fitted state as flat arrays:
+
+- TF-IDF vocabulary as one UTF-8 blob + offsets (column order), idf weights
+- One-hot categories per column, in the same blob + offsets form
+- All trees concatenated into node arrays, with int32 children (leaves
+  point to themselves), int16/int32 feature ids and float32 thresholds
+
+Thresholds are rounded *down* to float32. The forest compares float32
+features (sklearn casts X to float32) against float64 thresholds, and for a
+float32 x, x <= t holds exactly when x <= the largest float32 <= t, so the
+quantization does not change any split. Leaf values stay float64.
+
+File layout: 8-byte magic, uint64 header length, JSON header (settings plus
+name -> dtype/shape/offset of every array), then the raw arrays, each
+aligned to 64 bytes. read_artifact maps the file with np.memmap and returns
+views into it, so worker processes loading the same file share its pages.
+
+Usage: python model_artifact.py [model.pkl] [-o model.bin]
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+MAGIC = b'VDMODEL1'
+ALIGN = 64
+FORMAT_VERSION = 1
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def write_artifact(path, meta, arrays):
+    """
+    Writes meta + arrays to path atomically (temp file + os.replace), so
+    readers never map a half-written file.
+    """
+    specs = {}
+    offset = 0
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    for name, a in arrays.items():
+        specs[name] = {'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': offset}
+        offset = _aligned(offset + a.nbytes)
+
+    # Array offsets are relative to the end of the (padded) header
+    header = json.dumps({**meta, 'arrays': specs}).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(data_start + specs[name]['offset'])
+            f.write(a.tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path, mmap=True):
+    """
+    Returns (meta, arrays). With mmap=True the arrays are read-only views
+    into one np.memmap of the file; otherwise the file is read into memory.
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a model artifact")
+        header_len = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        meta = json.loads(f.read(header_len).decode('utf-8'))
+        buffer = None if mmap else f.read()
+
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    if mmap:
+        buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    else:
+        # The buffer was read from the end of the header
+        data_start -= len(MAGIC) + 8 + header_len
+
+    arrays = {}
+    for name, spec in meta.pop('arrays').items():
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + spec['offset']).reshape(spec['shape'])
+    return meta, arrays
+
+
+def pack_strings(values):
+    encoded = [v.encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets):
+    blob = data.tobytes()
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+def _round_down_float32(values):
+    rounded = values.astype(np.float32)
+    too_big = rounded.astype(np.float64) > values
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def export_text(vectorizer, arrays):
+    unsupported = {
+        'analyzer': vectorizer.analyzer != 'word',
+        'tokenizer': vectorizer.tokenizer is not None,
+        'preprocessor': vectorizer.preprocessor is not None,
+        'strip_accents': vectorizer.strip_accents is not None,
+    }
+    for param, bad in unsupported.items():
+        if bad:
+            raise ValueError(f"Unsupported TfidfVectorizer setting: {param}={getattr(vectorizer, param)!r}")
+
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    arrays['vocab_data'], arrays['vocab_offsets'] = pack_strings(terms)
+    if vectorizer.use_idf:
+        arrays['idf'] = np.asarray(vectorizer.idf_, dtype=np.float64)
+
+    stop_words = vectorizer.get_stop_words()
+    return {
+        'n_features': len(terms),
+        'lowercase': bool(vectorizer.lowercase),
+        'token_pattern': vectorizer.token_pattern,
+        'ngram_range': list(vectorizer.ngram_range),
+        'stop_words': sorted(stop_words) if stop_words else [],
+        'binary': bool(vectorizer.binary),
+        'sublinear_tf': bool(vectorizer.sublinear_tf),
+        'use_idf': bool(vectorizer.use_idf),
+        'norm': vectorizer.norm,
+    }
+
+
+def _export_categories(encoder, columns, arrays):
+    if encoder.drop_idx_ is not None or getattr(encoder, 'infrequent_categories_', None):
+        raise ValueError("Unsupported OneHotEncoder setting: drop / infrequent categories")
+    if encoder.handle_unknown not in ('ignore', 'infrequent_if_exist'):
+        raise ValueError(f"Unsupported OneHotEncoder setting: handle_unknown={encoder.handle_unknown!r}")
+
+    specs = []
+    for i, (column, categories) in enumerate(zip(columns, encoder.categories_)):
+        is_nan = [not isinstance(c, str) and c != c for c in categories]
+        values = [str(c) for c, nan in zip(categories, is_nan) if not nan]
+        arrays[f'cat{i}_data'], arrays[f'cat{i}_offsets'] = pack_strings(values)
+        specs.append({
+            'column': column,
+            'n_features': len(categories),
+            # Position of the NaN category (sorted last by the encoder), -1 if none
+            'nan_index': is_nan.index(True) if any(is_nan) else -1,
+        })
+    return specs
+
+
+def _export_forest(forest, n_features, arrays):
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    if any(tree.n_outputs != 1 for tree in trees):
+        raise ValueError("Only single-output forests can be exported")
+
+    roots = np.cumsum([0] + [tree.node_count for tree in trees])
+    left, right, feature, threshold, value = [], [], [], [], []
+    for tree, base in zip(trees, roots):
+        ids = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        # Leaves point to themselves, so every tree can be walked for the
+        # same number of levels without per-row termination checks
+        left.append(np.where(leaf, ids, tree.children_left) + base)
+        right.append(np.where(leaf, ids, tree.children_right) + base)
+        feature.append(np.where(leaf, 0, tree.feature))
+        threshold.append(np.where(leaf, np.inf, tree.threshold))
+        value.append(tree.value[:, 0, 0])
+
+    feature_dtype = np.int16 if n_features <= np.iinfo(np.int16).max else np.int32
+    arrays['tree_roots'] = roots[:-1].astype(np.int32)
+    arrays['node_left'] = np.concatenate(left).astype(np.int32)
+    arrays['node_right'] = np.concatenate(right).astype(np.int32)
+    arrays['node_feature'] = np.concatenate(feature).astype(feature_dtype)
+    arrays['node_threshold'] = _round_down_float32(np.concatenate(threshold))
+    arrays['node_value'] = np.concatenate(value).astype(np.float64)
+    return {
+        'n_trees': len(trees),
+        'n_nodes': int(roots[-1]),
+        'max_depth': max(tree.max_depth for tree in trees),
+    }
+
+
+def export_pipeline(model):
+    """
+    Flattens a fitted train_valuation Pipeline (ColumnTransformer with a
+    TfidfVectorizer on 'pitch' and a OneHotEncoder on industry/city, then a
+    RandomForestRegressor) into (meta, arrays). Raises ValueError for
+    pipelines it cannot represent.
+    """
+    try:
+        preprocessor = model.named_steps['preprocessor']
+        regressor = model.named_steps['regressor']
+    except (AttributeError, KeyError):
+        raise ValueError("Expected a Pipeline with 'preprocessor' and 'regressor' steps")
+
+    transformers = {name: (transformer, columns) for name, transformer, columns in preprocessor.transformers_
+                    if name != 'remainder'}
+    if set(transformers) != {'text', 'cat'} or not hasattr(regressor, 'estimators_') \
+            or not hasattr(regressor.estimators_[0], 'tree_'):
+        raise ValueError(f"Unsupported pipeline: {list(transformers)} -> {type(regressor).__name__}")
+
+    arrays = {}
+    vectorizer, text_column = transformers['text']
+    encoder, cat_columns = transformers['cat']
+    meta = {
+        'format': FORMAT_VERSION,
+        'text_column': text_column,
+        'text': export_text(vectorizer, arrays),
+        'categorical': _export_categories(encoder, list(cat_columns), arrays),
+    }
+    n_features = meta['text']['n_features'] + sum(c['n_features'] for c in meta['categorical'])
+    meta['n_features'] = n_features
+    meta['forest'] = _export_forest(regressor, n_features, arrays)
+    return meta, arrays
+
+
+def export_artifact(model, path):
+    meta, arrays = export_pipeline(model)
+    write_artifact(path, meta, arrays)
+    return meta
+
+
+def main(argv=None):
+    models_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'models')
+    parser = argparse.ArgumentParser(description="Convert a pickled valuation Pipeline into a compact artifact.")
+    parser.add_argument('model', nargs='?', default=os.path.join(models_dir, 'valuation_model.pkl'))
+    parser.add_argument('-o', '--output', default=None, help="Defaults to <model>.bin")
+    args = parser.parse_args(argv)
+
+    import joblib
+
+    output = args.output or f"{os.path.splitext(args.model)[0]}.bin"
+    start = time.perf_counter()
+    model = joblib.load(args.model)
+    pickle_load = time.perf_counter() - start
+
+    meta = export_artifact(model, output)
+
+    start = time.perf_counter()
+    read_artifact(output)
+    artifact_load = time.perf_counter() - start
+
+    print(f"Exported {meta['forest']['n_trees']} trees / {meta['forest']['n_nodes']:,} nodes to {output}")
+    print(f"   Size: {os.path.getsize(args.model):,} bytes (pickle) -> {os.path.getsize(output):,} bytes")
+    print(f"   Load: {pickle_load * 1000:.1f} ms (joblib, incl. imports) -> {artifact_load * 1000:.1f} ms (mmap)")
+
+
+if __name__ == "__main__":
+    main()
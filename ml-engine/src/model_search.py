@@ -0,0 +1,191 @@
+"""
+Cross-validated search over vectorizer and regressor settings.
+
+Every (vectorizer, regressor) candidate is scored with K-fold CV on the log
+funding amount. The expensive part that candidates share, fitting the
+TF-IDF + one-hot preprocessor, is done once per (vectorizer, fold) and the
+transformed matrices are reused by every regressor. All fits run in
+parallel worker processes (joblib).
+
+For each candidate the report gives:
+- mae      : mean absolute error in dollars, averaged over folds
+- r2       : R² on the log scale
+- fit_s    : regressor fit time per fold (preprocessing excluded)
+- predict_ms : single-request latency (preprocess + predict one row),
+             measured afterwards in the parent process, not under load
+- batch_us : per-row predict time on a whole validation fold
+
+Used through: python train_valuation.py --search [--folds 3] [--jobs -1]
+"""
+import json
+import statistics
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import Ridge
+from sklearn.metrics import mean_absolute_error, r2_score
+from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder
+
+FEATURES = ['pitch', 'industry', 'city']
+
+# We look for top N keywords, and optionally pairs of words (ngrams) like "ai platform"
+VECTORIZERS = {
+    'tfidf_1k_bigram': {'max_features': 1000, 'ngram_range': (1, 2)},
+    'tfidf_2k_bigram': {'max_features': 2000, 'ngram_range': (1, 2)},
+    'tfidf_1k_unigram': {'max_features': 1000, 'ngram_range': (1, 1)},
+}
+
+REGRESSORS = {
+    'random_forest': (RandomForestRegressor, {'n_estimators': 100, 'max_depth': 20, 'random_state': 42}),
+    'random_forest_small': (RandomForestRegressor, {'n_estimators': 40, 'max_depth': 14, 'random_state': 42}),
+    'hist_gb': (HistGradientBoostingRegressor, {'max_iter': 200, 'learning_rate': 0.1, 'random_state': 42}),
+    'ridge': (Ridge, {'alpha': 1.0}),
+    'ridge_strong': (Ridge, {'alpha': 5.0}),
+}
+
+# Current production settings
+DEFAULT_VECTORIZER = 'tfidf_1k_bigram'
+DEFAULT_REGRESSOR = 'random_forest'
+
+# These learners only accept dense input
+DENSE_REGRESSORS = (HistGradientBoostingRegressor,)
+
+
+def needs_dense(regressor_name):
+    return issubclass(REGRESSORS[regressor_name][0], DENSE_REGRESSORS)
+
+
+def build_preprocessor(vectorizer_name, dense=False):
+    # A. Text Processing (The Pitch) -> TF-IDF
+    # B. Category Processing (Industry, City) -> OneHot
+    return ColumnTransformer(
+        transformers=[
+            ('text', TfidfVectorizer(stop_words='english', **VECTORIZERS[vectorizer_name]), 'pitch'),
+            ('cat', OneHotEncoder(handle_unknown='ignore'), ['industry', 'city'])
+        ],
+        sparse_threshold=0 if dense else 0.3
+    )
+
+
+def build_regressor(regressor_name, n_jobs=-1):
+    cls, params = REGRESSORS[regressor_name]
+    if 'n_jobs' in cls().get_params():
+        params = {**params, 'n_jobs': n_jobs}
+    return cls(**params)
+
+
+def build_pipeline(vectorizer_name=DEFAULT_VECTORIZER, regressor_name=DEFAULT_REGRESSOR, n_jobs=-1):
+    return Pipeline(steps=[
+        ('preprocessor', build_preprocessor(vectorizer_name, dense=needs_dense(regressor_name))),
+        ('regressor', build_regressor(regressor_name, n_jobs))
+    ])
+
+
+def _fit_features(vectorizer_name, X, train_idx, val_idx):
+    preprocessor = build_preprocessor(vectorizer_name)
+    X_train = preprocessor.fit_transform(X.iloc[train_idx])
+    X_val = preprocessor.transform(X.iloc[val_idx])
+    return preprocessor, X_train, X_val
+
+
+def _fit_regressor(regressor_name, X_train, y_train, X_val, y_val, keep_model):
+    if needs_dense(regressor_name):
+        X_train, X_val = X_train.toarray(), X_val.toarray()
+
+    # One job per regressor: the search parallelizes across candidates
+    regressor = build_regressor(regressor_name, n_jobs=1)
+    start = time.perf_counter()
+    regressor.fit(X_train, y_train)
+    fit_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = regressor.predict(X_val)
+    batch_us = (time.perf_counter() - start) / X_val.shape[0] * 1e6
+
+    return {
+        'mae': mean_absolute_error(np.expm1(y_val), np.expm1(y_pred)),
+        'r2': r2_score(y_val, y_pred),
+        'fit_s': fit_s,
+        'batch_us': batch_us,
+        'model': regressor if keep_model else None,
+    }
+
+
+def _single_row_latency(preprocessor, regressor, row, repeat=30):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        features = preprocessor.transform(row)
+        if isinstance(regressor, DENSE_REGRESSORS):
+            features = features.toarray()
+        regressor.predict(features)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def search(df, vectorizers=None, regressors=None, folds=3, n_jobs=-1, verbose=0):
+    """
+    Returns one result dict per (vectorizer, regressor), best MAE first.
+    """
+    vectorizers = vectorizers or list(VECTORIZERS)
+    regressors = regressors or list(REGRESSORS)
+    X = df[FEATURES]
+    # --- CRITICAL: THE LOG TRANSFORM TO NORMALIZE ---
+    y = np.log1p(df['funding_amount']).to_numpy()
+    splits = list(KFold(n_splits=folds, shuffle=True, random_state=42).split(X))
+
+    parallel = Parallel(n_jobs=n_jobs, verbose=verbose)
+
+    # 1. Fit each preprocessor once per fold
+    feature_jobs = [(v, k) for v in vectorizers for k in range(folds)]
+    fitted = parallel(delayed(_fit_features)(v, X, *splits[k]) for v, k in feature_jobs)
+    features = dict(zip(feature_jobs, fitted))
+
+    # 2. Fit every regressor on the cached matrices
+    fit_jobs = [(v, r, k) for v in vectorizers for r in regressors for k in range(folds)]
+    scores = parallel(
+        delayed(_fit_regressor)(r, features[v, k][1], y[splits[k][0]], features[v, k][2], y[splits[k][1]], k == 0)
+        for v, r, k in fit_jobs
+    )
+    by_candidate = {}
+    for (v, r, k), score in zip(fit_jobs, scores):
+        by_candidate.setdefault((v, r), []).append(score)
+
+    # 3. Serving latency of the fold-0 models, measured one at a time
+    one_row = X.iloc[splits[0][1][:1]]
+    results = []
+    for (v, r), fold_scores in by_candidate.items():
+        maes = [s['mae'] for s in fold_scores]
+        results.append({
+            'vectorizer': v,
+            'regressor': r,
+            'mae': statistics.mean(maes),
+            'mae_std': statistics.stdev(maes) if len(maes) > 1 else 0.0,
+            'r2': statistics.mean(s['r2'] for s in fold_scores),
+            'fit_s': statistics.mean(s['fit_s'] for s in fold_scores),
+            'predict_ms': _single_row_latency(features[v, 0][0], fold_scores[0]['model'], one_row),
+            'batch_us': statistics.mean(s['batch_us'] for s in fold_scores),
+        })
+    return sorted(results, key=lambda row: row['mae'])
+
+
+def format_results(results):
+    lines = [f"{'vectorizer':<18} {'regressor':<20} {'MAE ($)':>14} {'R² (log)':>9} "
+             f"{'fit (s)':>8} {'1 row (ms)':>10} {'batch (µs/row)':>14}"]
+    for row in results:
+        lines.append(f"{row['vectorizer']:<18} {row['regressor']:<20} {row['mae']:>14,.0f} {row['r2']:>9.3f} "
+                     f"{row['fit_s']:>8.2f} {row['predict_ms']:>10.2f} {row['batch_us']:>14.1f}")
+    return '\n'.join(lines)
+
+
+def write_report(results, path):
+    with open(path, 'w') as f:
+        json.dump([{k: (round(v, 6) if isinstance(v, float) else v) for k, v in row.items()} for row in results],
+                  f, indent=2)
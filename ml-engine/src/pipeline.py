@@ -0,0 +1,318 @@
+"""
+Runs the whole system from one process: the scraper, the funding data
+cleaning/augmentation, training and the similar startups index.
+
+The stages form a DAG:
+
+    scrape ------------------------------> similar
+    clean ----> augment ----> train
+
+Each stage declares its input and output files, the source files of its code
+and its config. Its fingerprint is a sha256 over the content of the inputs
+and code plus the config; after a successful run it is stored in STATE_PATH
+together with the digests of the outputs. A stage is skipped while its
+fingerprint is unchanged and its outputs are still the ones it wrote, so a
+change anywhere upstream re-runs exactly the stages below it.
+
+The scrape stage has no input files (its input is the web). It is re-run
+when it is older than --scrape-max-age hours, in incremental mode (HTTP
+cache + crawl state, see scraper.py).
+
+--format sets the format of every file handed between stages, the scraped
+startups included (as parquet for --format feather, which the scraper does
+not write).
+
+Stages whose dependencies are done run concurrently in a thread pool, so the
+network-bound scrape overlaps with cleaning, augmenting and training. Every
+stage is called in-process; a failed stage blocks only its dependents.
+
+Usage: python pipeline.py [--stages STAGE ...] [--force STAGE ...]
+                          [--format csv|parquet|feather] [--jobs N] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from tables import FORMATS, with_format
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ML_DIR = os.path.normpath(os.path.join(SRC_DIR, '..'))
+SCRAPER_SRC_DIR = os.path.normpath(os.path.join(SRC_DIR, '../../scraper/src'))
+STATE_PATH = os.path.join(ML_DIR, 'data/.pipeline_state.json')
+SCRAPE_MAX_AGE_HOURS = 24
+
+FUNDING_PATH = os.path.join(ML_DIR, 'data/startup_funding.csv')
+CLEANED_PATH = os.path.join(ML_DIR, 'data/cleaned_data.csv')
+AUGMENTED_PATH = os.path.join(ML_DIR, 'data/augmented_data.csv')
+MODEL_PATH = os.path.join(ML_DIR, 'models/valuation_model.pkl')
+ARTIFACT_PATH = os.path.join(ML_DIR, 'models/valuation_model.bin')
+ROWS_PATH = os.path.join(ML_DIR, 'models/valuation_model.rows.npy')
+STARTUPS_PATH = os.path.normpath(os.path.join(SCRAPER_SRC_DIR, '../data/startups.csv'))
+SIMILAR_PATH = os.path.join(ML_DIR, 'models/similar_startups.bin')
+
+# The scraper writes csv, jsonl or parquet, so a feather run hands its
+# startups over as parquet
+SCRAPER_FORMATS = {'csv': 'csv', 'parquet': 'parquet', 'feather': 'parquet'}
+
+SCRAPER_CODE = [os.path.join(SCRAPER_SRC_DIR, name) for name in (
+    'scraper.py', 'parsers.py', 'fetcher.py', 'orchestrator.py', 'sinks.py', 'crawl_state.py', 'http_cache.py')]
+
+
+def _code(*names):
+    return [os.path.join(SRC_DIR, name) for name in names]
+
+
+def file_digest(path, block_size=1 << 20):
+    # A directory (the scraper's Parquet parts) digests its files by name
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            digest.update(f"{name}:{file_digest(os.path.join(path, name))}".encode('utf-8'))
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Stage:
+
+    def __init__(self, name, run, deps=(), inputs=(), outputs=(), code=(), config=None, max_age=None,
+                 optional=()):
+        self.name = name
+        self.run = run
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        # Outputs a run may legitimately not produce; they are still tracked,
+        # so deleting one the last run wrote re-runs the stage
+        self.optional = set(optional)
+        self.code = list(code)
+        self.config = config or {}
+        # Seconds after which the stage runs again even if nothing changed
+        self.max_age = max_age
+
+    def fingerprint(self):
+        spec = {
+            'inputs': {path: file_digest(path) for path in self.inputs},
+            'code': {os.path.basename(path): file_digest(path) for path in self.code},
+            'config': self.config,
+        }
+        return hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def output_digests(self):
+        return {path: file_digest(path) if os.path.exists(path) else None for path in self.outputs}
+
+    def missing_outputs(self):
+        return [path for path in self.outputs if path not in self.optional and not os.path.exists(path)]
+
+    def is_fresh(self, record, fingerprint):
+        # record: what the last successful run stored in the state file
+        if record is None or record['fingerprint'] != fingerprint:
+            return False
+        if self.max_age is not None and time.time() - record['finished_at'] > self.max_age:
+            return False
+        if self.missing_outputs():
+            return False
+        return self.output_digests() == record['outputs']
+
+
+# --- STAGES ---
+
+def run_scrape(output_file):
+    if SCRAPER_SRC_DIR not in sys.path:
+        sys.path.insert(0, SCRAPER_SRC_DIR)
+    import scraper
+
+    if scraper.main(['--incremental', '--output', output_file]) != 0:
+        raise RuntimeError("Scraper failed; see its log")
+
+
+def run_clean(output_file):
+    from process_data import process_data
+    process_data(FUNDING_PATH, output_file)
+
+
+def run_augment(input_file, output_file):
+    from augment_data import augment_data
+    augment_data(input_file, output_file)
+
+
+def run_train(data_file, vectorizer, regressor):
+    from train_valuation import train
+    train(vectorizer, regressor, data_file=data_file)
+
+
+def run_similar(data_file):
+    from similar_startups import build_index
+    build_index(data_file, SIMILAR_PATH)
+
+
+def build_stages(fmt='csv', vectorizer=None, regressor=None, scrape_max_age_hours=SCRAPE_MAX_AGE_HOURS):
+    import sklearn
+    from model_search import DEFAULT_REGRESSOR, DEFAULT_VECTORIZER
+
+    vectorizer = vectorizer or DEFAULT_VECTORIZER
+    regressor = regressor or DEFAULT_REGRESSOR
+    cleaned = with_format(CLEANED_PATH, fmt)
+    augmented = with_format(AUGMENTED_PATH, fmt)
+    startups = with_format(STARTUPS_PATH, SCRAPER_FORMATS[fmt])
+
+    stages = [
+        Stage('scrape', lambda: run_scrape(startups), outputs=[startups], code=SCRAPER_CODE,
+              config={'incremental': True}, max_age=scrape_max_age_hours * 3600),
+        Stage('clean', lambda: run_clean(cleaned),
+              inputs=[FUNDING_PATH], outputs=[cleaned], code=_code('process_data.py', 'tables.py')),
+        Stage('augment', lambda: run_augment(cleaned, augmented), deps=['clean'],
+              inputs=[cleaned], outputs=[augmented], code=_code('augment_data.py', 'tables.py')),
+        Stage('train', lambda: run_train(augmented, vectorizer, regressor), deps=['augment'],
+              inputs=[augmented], outputs=[MODEL_PATH, ARTIFACT_PATH, ROWS_PATH],
+              # Models the compact format cannot hold are served from the pickle
+              optional=[ARTIFACT_PATH],
+              code=_code('train_valuation.py', 'model_search.py', 'feature_store.py', 'incremental.py',
+                         'model_artifact.py', 'tables.py'),
+              config={'vectorizer': vectorizer, 'regressor': regressor, 'sklearn': sklearn.__version__}),
+        Stage('similar', lambda: run_similar(startups), deps=['scrape'],
+              inputs=[startups], outputs=[SIMILAR_PATH],
+              code=_code('similar_startups.py', 'compact_model.py', 'model_artifact.py', 'tables.py')),
+    ]
+    return {stage.name: stage for stage in stages}
+
+
+def with_dependencies(stages, targets):
+    # targets plus everything upstream of them, in declaration order
+    selected = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(stages[name].deps)
+    return [name for name in stages if name in selected]
+
+
+# --- RUNNER ---
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def execute(stage):
+    # Returns (fingerprint, seconds); the fingerprint is taken before the
+    # run so an input changing meanwhile is picked up next time
+    fingerprint = stage.fingerprint()
+    start = time.perf_counter()
+    stage.run()
+    missing = stage.missing_outputs()
+    if missing:
+        raise RuntimeError(f"Stage did not produce {', '.join(missing)}")
+    return fingerprint, time.perf_counter() - start
+
+
+def run_pipeline(stages, names, force=(), jobs=2, dry_run=False, state_path=STATE_PATH):
+    """
+    Runs the stages in names (which must include their dependencies).
+    Returns {stage: (status, seconds)}, status one of ran, skipped,
+    failed, blocked (a dependency failed) or, with dry_run, would-run.
+    """
+    state = load_state(state_path)
+    results = {}
+    pending = list(names)
+    running = {}
+    started = {}
+
+    def ready(name):
+        return all(dep in results for dep in stages[name].deps)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in [n for n in pending if ready(n)]:
+                pending.remove(name)
+                stage = stages[name]
+                dep_status = {results[dep][0] for dep in stage.deps}
+                if dep_status & {'failed', 'blocked'}:
+                    results[name] = ('blocked', 0.0)
+                elif name not in force and not dep_status & {'ran', 'would-run'} and \
+                        stage.is_fresh(state.get(name), stage.fingerprint()):
+                    results[name] = ('skipped', 0.0)
+                elif dry_run:
+                    results[name] = ('would-run', 0.0)
+                else:
+                    print(f"▶ [{name}] started")
+                    started[name] = time.perf_counter()
+                    running[pool.submit(execute, stage)] = name
+
+            if not running:
+                if pending and not any(ready(n) for n in pending):
+                    raise ValueError(f"Dependencies of {', '.join(pending)} are not part of the run")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    fingerprint, seconds = future.result()
+                except Exception:
+                    traceback.print_exc()
+                    print(f"❌ [{name}] failed")
+                    results[name] = ('failed', time.perf_counter() - started[name])
+                    continue
+                state[name] = {'fingerprint': fingerprint, 'outputs': stages[name].output_digests(),
+                               'finished_at': time.time(), 'seconds': seconds}
+                save_state(state, state_path)
+                print(f"✅ [{name}] finished in {seconds:.2f}s")
+                results[name] = ('ran', seconds)
+    return {name: results[name] for name in names}
+
+
+def format_report(results, wall_s):
+    lines = [f"{'stage':<10} {'status':<10} {'seconds':>8}"]
+    for name, (status, seconds) in results.items():
+        lines.append(f"{name:<10} {status:<10} {seconds:>8.2f}")
+    busy = sum(seconds for _, seconds in results.values())
+    lines.append(f"Wall time {wall_s:.2f}s (stages {busy:.2f}s)")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scrape -> clean -> augment -> train pipeline")
+    parser.add_argument('--stages', nargs='+', default=None,
+                        help="Stages to bring up to date, with their dependencies (default: all)")
+    parser.add_argument('--force', nargs='+', default=[], help="Re-run these stages even if up to date")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Format of the data between stages")
+    parser.add_argument('--vectorizer', default=None)
+    parser.add_argument('--regressor', default=None)
+    parser.add_argument('--scrape-max-age', type=float, default=SCRAPE_MAX_AGE_HOURS,
+                        help="Hours after which the scrape stage runs again")
+    parser.add_argument('--jobs', type=int, default=2, help="Stages run concurrently")
+    parser.add_argument('--dry-run', action='store_true', help="Only show which stages would run")
+    args = parser.parse_args(argv)
+
+    stages = build_stages(args.format, args.vectorizer, args.regressor, args.scrape_max_age)
+    unknown = [name for name in (args.stages or []) + args.force if name not in stages]
+    if unknown:
+        parser.error(f"Unknown stage(s): {', '.join(unknown)} (expected: {', '.join(stages)})")
+
+    names = with_dependencies(stages, args.stages or list(stages))
+    start = time.perf_counter()
+    results = run_pipeline(stages, names, set(args.force), args.jobs, args.dry_run)
+    print(format_report(results, time.perf_counter() - start))
+    return 1 if any(status in ('failed', 'blocked') for status, _ in results.values()) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,59 +1,353 @@
 import sys
 import json
-import joblib
-import pandas as pd
 import numpy as np
 import os
+import time
 
 # Suppress warnings to keep JSON output clean
 import warnings
 warnings.filterwarnings("ignore")
 
-def predict(pitch, industry, city):
-    # 1. Load the saved model
+from compact_model import BLOCK_ROWS, CompactModel
+from metrics import REGISTRY
+from prediction_cache import PredictionCache, model_version, normalize_text
+from similar_startups import SimilarStartups
+
+# --- CONFIG ---
+MODEL_PATH = '../models/valuation_model.pkl'
+ARTIFACT_PATH = '../models/valuation_model.bin'
+# 'auto' serves the compact artifact (NumPy only, no pandas/sklearn import)
+# when it is at least as new as the pickle; 'compact' / 'sklearn' force one
+ENGINE = os.environ.get('PREDICTOR_ENGINE', 'auto')
+CACHE_MAX_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 1024))
+CACHE_TTL_SECONDS = float(os.environ.get('PREDICTION_CACHE_TTL', 600))
+# Built by similar_startups.py; results list the SIMILAR_K closest active and
+# failed startups to the pitch (0 disables the lookup)
+SIMILAR_PATH = '../models/similar_startups.bin'
+SIMILAR_K = int(os.environ.get('SIMILAR_STARTUPS_K', 3))
+
+# Loaded once per process, so a long-lived worker (--serve) only pays
+# for the imports and model load on startup. The file is re-checked on
+# every call and reloaded when train_valuation.py writes a new one.
+# _model_version is (engine, file version).
+_model = None
+_model_version = None
+_categories = None
+_similar = None
+_similar_version = None
+_cache = PredictionCache(max_size=CACHE_MAX_SIZE, ttl=CACHE_TTL_SECONDS)
+
+# --- METRICS (served to the backend through {"cmd": "metrics"}) ---
+PREDICT_SECONDS = REGISTRY.histogram('predict_seconds', 'predict() latency', ['outcome'])
+STAGE_SECONDS = REGISTRY.histogram('predict_stage_seconds', 'Time spent in each stage of predict()', ['stage'])
+BATCH_SIZE = REGISTRY.histogram('predict_batch_size', 'Requests per predict_many() call', [],
+                                buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+MODEL_LOADS = REGISTRY.counter('model_loads_total', 'Model (re)loads', ['engine'])
+MODEL_LOAD_SECONDS = REGISTRY.histogram('model_load_seconds', 'Model load time', ['engine'],
+                                        buckets=(0.001, 0.01, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
+REGISTRY.gauge('prediction_cache_events_total', 'Prediction cache events', type='counter', fn=lambda: [
+    ({'event': event}, _cache.stats()[stat])
+    for event, stat in (('hit', 'hits'), ('miss', 'misses'), ('eviction', 'evictions'),
+                        ('expiration', 'expirations'), ('invalidation', 'invalidations'))
+])
+REGISTRY.gauge('prediction_cache_entries', 'Entries in the prediction cache', fn=lambda: [({}, _cache.stats()['size'])])
+
+def get_model_path():
     # Resolve path relative to this script
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(base_dir, '../models/valuation_model.pkl')
-    
-    if not os.path.exists(model_path):
-        return {"error": "Model file not found. Train it first!"}
+    return os.path.join(base_dir, MODEL_PATH)
+
+def get_artifact_path():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, ARTIFACT_PATH)
+
+def select_model_file():
+    # Returns (engine, path, version); version is None when the file is missing
+    pickle_path, artifact_path = get_model_path(), get_artifact_path()
+    pickle_version = model_version(pickle_path)
+    artifact_version = model_version(artifact_path)
+
+    if ENGINE == 'compact':
+        return 'compact', artifact_path, artifact_version
+    if ENGINE == 'sklearn' or artifact_version is None:
+        return 'sklearn', pickle_path, pickle_version
+    # A pickle newer than the artifact was not exported (e.g. copied in by
+    # hand); serve the pickle rather than a stale artifact
+    if pickle_version is not None and pickle_version[1] > artifact_version[1]:
+        return 'sklearn', pickle_path, pickle_version
+    return 'compact', artifact_path, artifact_version
+
+def load_model():
+    global _model, _model_version, _categories
+    engine, model_path, version = select_model_file()
+
+    if version is None:
+        return None
+
+    if _model is None or (engine, version) != _model_version:
+        with MODEL_LOAD_SECONDS.time(engine=engine):
+            if engine == 'compact':
+                _model = CompactModel(model_path)
+            else:
+                import joblib
+                _model = joblib.load(model_path)
+        MODEL_LOADS.inc(engine=engine)
+        _model_version = (engine, version)
+        _categories = category_lookup(_model)
+    return _model
+
+def load_similar():
+    # Same reload-on-change as the model; a missing or unreadable index only
+    # leaves the similar startups out of the response
+    global _similar, _similar_version
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), SIMILAR_PATH)
+    version = model_version(path) if SIMILAR_K > 0 else None
+
+    if version is None:
+        _similar, _similar_version = None, None
+    elif version != _similar_version:
+        _similar_version = version
+        try:
+            _similar = SimilarStartups(path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: similar startups index not loaded: {e}", file=sys.stderr)
+            _similar = None
+    return _similar
+
+def serving_version():
+    # Cached responses are only valid for the model and index they came from
+    return _model_version, _similar_version
+
+def category_lookup(model):
+    # Per categorical column (industry, city): the exact categories the
+    # encoder was fitted on, and the case/whitespace-insensitive spellings
+    # that point to exactly one of them. Spellings shared by several
+    # categories (FinTech/Fintech, E-Commerce/E-commerce, ...) are left out,
+    # so they never redirect an input to a different one-hot column
+    if isinstance(model, CompactModel):
+        categories = model.categories
+    else:
+        try:
+            encoder = model.named_steps['preprocessor'].named_transformers_['cat']
+            categories = encoder.categories_
+        except (AttributeError, KeyError):
+            return None
+    lookups = []
+    for column in categories:
+        exact = {c for c in column if isinstance(c, str)}
+        spellings = {}
+        for c in exact:
+            spellings.setdefault(normalize_text(c), []).append(c)
+        lookups.append((exact, {k: v[0] for k, v in spellings.items() if len(v) == 1}))
+    return lookups
+
+def resolve_category(value, lookup):
+    # An exact match wins; otherwise an unambiguous spelling of one known
+    # category; otherwise the value goes to the model unchanged
+    value = value if isinstance(value, str) else str(value)
+    if lookup is None:
+        return value
+    exact, spellings = lookup
+    if value in exact:
+        return value
+    return spellings.get(normalize_text(value), value)
+
+def normalize_input(pitch, industry, city):
+    # The cache key holds exactly what the model sees
+    industry_lookup, city_lookup = _categories if _categories is not None else (None, None)
+    return normalize_text(pitch), resolve_category(industry, industry_lookup), resolve_category(city, city_lookup)
 
-    model = joblib.load(model_path)
+def cache_stats():
+    return _cache.stats()
+
+def predict_log(model, pitches, industries, cities):
+    # Log-scale predictions for parallel sequences of inputs, on either
+    # engine, timing the transform and forest stages separately
+    if isinstance(model, CompactModel):
+        if len(pitches) > BLOCK_ROWS:
+            # Large batches go block by block to bound the dense matrix
+            with STAGE_SECONDS.time(stage='batch'):
+                return model.predict(pitches, industries, cities)
+        with STAGE_SECONDS.time(stage='transform'):
+            X = model.transform(pitches, industries, cities)
+        with STAGE_SECONDS.time(stage='forest'):
+            return model.predict_features(X)
 
-    # 2. Prepare Input Data
     # We must match the DataFrame structure used during training
-    input_data = pd.DataFrame({
-        'pitch': [pitch],
-        'industry': [industry],
-        'city': [city]
-    })
+    import pandas as pd
+    with STAGE_SECONDS.time(stage='dataframe'):
+        input_data = pd.DataFrame({
+            'pitch': pitches,
+            'industry': industries,
+            'city': cities
+        })
+    with STAGE_SECONDS.time(stage='transform'):
+        X = model.named_steps['preprocessor'].transform(input_data)
+    with STAGE_SECONDS.time(stage='forest'):
+        return model.named_steps['regressor'].predict(X)
+
+def predict(pitch, industry, city):
+    return predict_many([(pitch, industry, city)])[0]
 
-    # 3. Make Prediction
+def predict_many(requests):
+    # Scores a list of (pitch, industry, city) together: cache hits are
+    # answered directly and the distinct misses share one TF-IDF transform
+    # and one forest pass (the backend sends micro-batches this way)
+    start = time.perf_counter()
+    scored = _predict_many(requests)
+    elapsed = time.perf_counter() - start
+    BATCH_SIZE.observe(len(requests))
+    for _, outcome in scored:
+        PREDICT_SECONDS.observe(elapsed, outcome=outcome)
+    return [result for result, _ in scored]
+
+def _predict_many(requests):
+    # Returns [(result, outcome)] with outcome one of: cache_hit, computed, error
+    # 1. Load the saved model
+    with STAGE_SECONDS.time(stage='load'):
+        model = load_model()
+        similar = load_similar()
+    if model is None:
+        return [({"error": "Model file not found. Train it first!"}, 'error')] * len(requests)
+
+    # 2. Check the cache (same input + same model file -> same answer);
+    # repeated inputs within the batch are only scored once
+    results = [None] * len(requests)
+    misses = {}
+    with STAGE_SECONDS.time(stage='cache'):
+        version = serving_version()
+        for i, (pitch, industry, city) in enumerate(requests):
+            key = normalize_input(pitch, industry, city)
+            cached = _cache.get(key, version)
+            if cached is not None:
+                results[i] = (cached, 'cache_hit')
+            else:
+                misses.setdefault(key, []).append(i)
+    if not misses:
+        return results
+
+    # 3. Make Predictions
+    keys = list(misses)
     try:
-        log_prediction = model.predict(input_data)
-        dollar_prediction = np.expm1(log_prediction)[0] # Convert log back to dollars
-        
-        return {
-            "success": True,
-            "predicted_valuation": round(dollar_prediction, 2),
-            "currency": "USD",
-            "confidence_score": "High" if dollar_prediction > 1000000 else "Medium"
-        }
+        pitches, industries, cities = (list(column) for column in zip(*keys))
+        dollar_predictions = np.expm1(predict_log(model, pitches, industries, cities)) # Convert log back to dollars
+
+        for key, dollar_prediction in zip(keys, dollar_predictions):
+            result = {
+                "success": True,
+                "predicted_valuation": round(dollar_prediction, 2),
+                "currency": "USD",
+                "confidence_score": "High" if dollar_prediction > 1000000 else "Medium"
+            }
+            if similar is not None:
+                with STAGE_SECONDS.time(stage='similar'):
+                    result["similar_startups"] = {
+                        outcome: similar.query(key[0], SIMILAR_K, outcome) for outcome in ('active', 'failed')
+                    }
+            _cache.put(key, version, result)
+            for i in misses[key]:
+                results[i] = (result, 'computed')
     except Exception as e:
-        return {"error": str(e)}
+        for indices in misses.values():
+            for i in indices:
+                results[i] = ({"error": str(e)}, 'error')
+    return results
+
+def predict_batch(df):
+    # Vectorized scoring: one TF-IDF transform and one forest pass for the
+    # whole frame instead of one per row. Expects pitch/industry/city columns.
+    import pandas as pd
+
+    model = load_model()
+    if model is None:
+        raise FileNotFoundError("Model file not found. Train it first!")
+
+    features = df[['pitch', 'industry', 'city']].copy()
+    if _categories is not None:
+        # Same category canonicalization as predict(), once per distinct value
+        for column, lookup in zip(('industry', 'city'), _categories):
+            values = features[column]
+            mapping = {v: resolve_category(v, lookup) for v in values.dropna().unique() if isinstance(v, str)}
+            features[column] = values.replace(mapping)
+
+    log_predictions = predict_log(model, features['pitch'].tolist(),
+                                  features['industry'].tolist(), features['city'].tolist())
+    dollar_predictions = np.expm1(log_predictions)
+
+    return pd.DataFrame({
+        'predicted_valuation': np.round(dollar_predictions, 2),
+        'confidence_score': np.where(dollar_predictions > 1000000, "High", "Medium")
+    }, index=df.index)
+
+def handle_request(request):
+    # One JSON object per line: {"id": ..., "pitch": ..., "industry": ..., "city": ...}
+    # or {"id": ..., "cmd": "stats"} for the cache counters,
+    # or {"id": ..., "cmd": "metrics"} for all metric families (metrics.py),
+    # or {"id": ..., "cmd": "batch", "items": [{"pitch": ..., ...}, ...]},
+    # answered with {"id": ..., "results": [...]} in item order.
+    # The id is echoed back so the caller can match responses to requests
+    if request.get('cmd') == 'batch':
+        items = request.get('items') or []
+        if not isinstance(items, list):
+            return {"id": request.get('id'), "error": "items must be a list"}
+        results = [{"error": "Not enough arguments. Need: pitch, industry, city"}] * len(items)
+        valid = [i for i, item in enumerate(items)
+                 if isinstance(item, dict) and all(item.get(field) for field in ('pitch', 'industry', 'city'))]
+        scored = predict_many([(items[i]['pitch'], items[i]['industry'], items[i]['city']) for i in valid])
+        for i, item_result in zip(valid, scored):
+            results[i] = item_result
+        result = {"results": results}
+    elif request.get('cmd') == 'stats':
+        load_model()
+        result = {"cache": cache_stats(), "engine": _model_version[0] if _model_version else None}
+    elif request.get('cmd') == 'metrics':
+        result = {"metrics": REGISTRY.collect()}
+    elif not all(request.get(field) for field in ('pitch', 'industry', 'city')):
+        result = {"error": "Not enough arguments. Need: pitch, industry, city"}
+    else:
+        result = predict(request['pitch'], request['industry'], request['city'])
+    return {"id": request.get('id'), **result}
+
+def serve(stdin=sys.stdin, stdout=sys.stdout):
+    # Warm up before the first request arrives
+    if load_model() is None:
+        print("Warning: model file not found, requests will fail until it is trained", file=sys.stderr)
+
+    # Tells the pool the worker is warm (it measures spawn -> ready)
+    stdout.write(json.dumps({"id": None, "ready": True, "engine": _model_version[0] if _model_version else None}) + "\n")
+    stdout.flush()
+
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request = None
+        try:
+            request = json.loads(line)
+            response = handle_request(request)
+        except Exception as e:
+            # Echo the id whenever the line parsed, so the caller is not left
+            # waiting for a response it cannot match
+            request_id = request.get('id') if isinstance(request, dict) else None
+            response = {"id": request_id, "error": str(e)}
+        stdout.write(json.dumps(response) + "\n")
+        stdout.flush()
 
 if __name__ == "__main__":
     # Input comes from command line arguments
     # Usage: python predict.py "My Idea" "Technology" "New York"
+    #    or: python predict.py --serve   (JSON lines on stdin/stdout)
     try:
-        if len(sys.argv) < 4:
+        if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+            serve()
+        elif len(sys.argv) < 4:
             print(json.dumps({"error": "Not enough arguments. Need: pitch, industry, city"}))
         else:
             pitch_arg = sys.argv[1]
             industry_arg = sys.argv[2]
             city_arg = sys.argv[3]
-            
+
             result = predict(pitch_arg, industry_arg, city_arg)
             print(json.dumps(result)) # Print JSON so Node.js can read it
     except Exception as e:
-        print(json.dumps({"error": str(e)}))
\ No newline at end of file
+        print(json.dumps({"error": str(e)}))
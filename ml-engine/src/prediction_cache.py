@@ -0,0 +1,93 @@
+import os
+import time
+from collections import OrderedDict
+
+def model_version(path):
+    """
+    Identifies one specific model file on disk. train_valuation.py replaces
+    the file atomically, so any retrain changes at least the inode/mtime.
+    Returns None when the file does not exist.
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+def normalize_text(value):
+    # Case and whitespace do not change the prediction for the pitch
+    # (TF-IDF lowercases and tokenizes on word boundaries)
+    return ' '.join(str(value).lower().split())
+
+class PredictionCache:
+    """
+    Size-bounded LRU cache with a per-entry TTL.
+    Entries are keyed on (normalized input, model version); when a new
+    model version is seen every cached entry is dropped.
+    """
+
+    def __init__(self, max_size=1024, ttl=600, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.version = None
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        self._check_version(version)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if self.clock() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(value)
+
+    def put(self, key, version, value):
+        self._check_version(version)
+        if self.max_size <= 0:
+            return
+
+        self._entries[key] = (self.clock() + self.ttl, dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations
+        }
@@ -1,25 +1,41 @@
+import argparse
+import io
 import pandas as pd
 import re
 import os
 
+from tables import FORMATS, FUNDING_DTYPES, TableWriter, read_table, with_format
+
+# Only these columns of startup_funding.csv are used; reading them as
+# strings keeps dtypes identical across chunks
+INPUT_COLUMNS = ['Industry Vertical', 'SubVertical', 'City  Location', 'Amount in USD']
+
 def clean_currency(x):
+    # Row-wise reference implementation (see clean_currency_column)
     if pd.isna(x):
         return 0
     # Convert to string, lowercase, remove commas
     x = str(x).replace(',', '').lower()
-    
+
     match = re.search(r'\d+(\.\d+)?', x)
     if match:
         return float(match.group())
     return 0
 
-def process_data(input_file, output_file):
-    print(f"Loading data from {input_file}...")
-    df = pd.read_csv(input_file)
-    
+def clean_currency_column(amounts):
+    # Vectorized clean_currency: same rules, applied to the whole column
+    # at once instead of one Python call + regex per row
+    text = amounts.astype('string').str.replace(',', '', regex=False)
+    numbers = text.str.extract(r'(\d+(?:\.\d+)?)', expand=False)
+    return pd.to_numeric(numbers, errors='coerce').fillna(0).astype('float64')
+
+def clean_frame(df, vectorized=True):
     # 1. Clean Target Variable (Funding Amount)
-    df['clean_amount'] = df['Amount in USD'].apply(clean_currency)
-    
+    if vectorized:
+        df['clean_amount'] = clean_currency_column(df['Amount in USD'])
+    else:
+        df['clean_amount'] = df['Amount in USD'].apply(clean_currency)
+
     # Filter: Keep valid funding amounts (e.g., $10k to $500M)
     # We remove 0s and extreme billion-dollar outliers which confuse the model
     df_clean = df[(df['clean_amount'] >= 10000) & (df['clean_amount'] <= 500000000)].copy()
@@ -27,28 +43,82 @@ def process_data(input_file, output_file):
     # 2. Clean Input Text (The "Pitch")
     # If 'SubVertical' (Pitch) is missing, use 'Industry Vertical' as fallback
     df_clean['SubVertical'] = df_clean['SubVertical'].fillna(df_clean['Industry Vertical'])
-    
+
     # Ensure all text is string and lowercase
     df_clean['pitch'] = df_clean['SubVertical'].astype(str).str.lower().str.strip()
-    
+
     # 3. Rename columns for clarity
     final_df = df_clean[['pitch', 'clean_amount', 'Industry Vertical', 'City  Location']]
     final_df.columns = ['pitch', 'funding_amount', 'industry', 'city']
-    
+
     # 4. Drop any remaining rows with missing critical data
-    final_df = final_df.dropna(subset=['pitch', 'funding_amount'])
-    
-    print(f"Data cleaned! {len(df)} rows -> {len(final_df)} rows.")
-    final_df.to_csv(output_file, index=False)
+    return final_df.dropna(subset=['pitch', 'funding_amount'])
+
+def read_input(input_file, chunksize=None):
+    return pd.read_csv(input_file, usecols=INPUT_COLUMNS, dtype=str, chunksize=chunksize)
+
+def process_data(input_file, output_file, chunksize=None):
+    # With chunksize, the CSV is processed in bounded-memory chunks and the
+    # output is appended chunk by chunk. The output format follows its
+    # extension (.csv, .parquet, .feather; see tables.py)
+    print(f"Loading data from {input_file}...")
+    chunks = read_input(input_file, chunksize) if chunksize else [read_input(input_file)]
+
+    rows_in = rows_out = 0
+    with TableWriter(output_file, FUNDING_DTYPES) as writer:
+        for chunk in chunks:
+            final_df = clean_frame(chunk)
+            writer.write(final_df)
+            rows_in += len(chunk)
+            rows_out += len(final_df)
+
+    print(f"Data cleaned! {rows_in} rows -> {rows_out} rows.")
     print(f"Saved to {output_file}")
 
+def verify(input_file, output_file, reference_file=None):
+    # Correctness check: compare the output with the row-wise reference
+    # implementation on the full file, or with an existing reference CSV
+    if reference_file:
+        expected = pd.read_csv(reference_file)
+        label = reference_file
+    else:
+        expected = clean_frame(pd.read_csv(input_file, dtype=str), vectorized=False).reset_index(drop=True)
+        # Round-trip through CSV so both sides are parsed the same way
+        expected = pd.read_csv(io.StringIO(expected.to_csv(index=False)))
+        label = "row-wise clean_currency"
+
+    actual = read_table(output_file, categorical=False)
+    if actual.shape != expected.shape or list(actual.columns) != list(expected.columns):
+        print(f"❌ Output shape {actual.shape} does not match {label} {expected.shape}")
+        return False
+
+    mismatched = ~((actual == expected) | (actual.isna() & expected.isna())).all(axis=1)
+    if mismatched.any():
+        print(f"❌ {mismatched.sum()} rows differ from {label}, e.g. rows {list(mismatched[mismatched].index[:5])}")
+        return False
+
+    print(f"✅ Output matches {label} ({len(actual)} rows).")
+    return True
+
 if __name__ == "__main__":
     # Define paths relative to where you run the script
     base_dir = os.path.dirname(os.path.abspath(__file__))
     input_path = os.path.join(base_dir, '../data/startup_funding.csv')
     output_path = os.path.join(base_dir, '../data/cleaned_data.csv')
-    
+
+    parser = argparse.ArgumentParser(description="Clean startup_funding.csv into cleaned_data.csv")
+    parser.add_argument('--input', default=input_path)
+    parser.add_argument('--output', default=None, help="Output file (.csv, .parquet or .feather)")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Format of the default output file")
+    parser.add_argument('--chunksize', type=int, default=None, help="Process the input in chunks of this many rows")
+    parser.add_argument('--verify', action='store_true', help="Check the output against the row-wise implementation")
+    parser.add_argument('--reference', default=None, help="With --verify, compare against this CSV instead")
+    args = parser.parse_args()
+    args.output = args.output or with_format(output_path, args.format)
+
     # Ensure data directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    process_data(input_path, output_path)
\ No newline at end of file
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+
+    process_data(args.input, args.output, args.chunksize)
+    if args.verify and not verify(args.input, args.output, args.reference):
+        raise SystemExit(1)
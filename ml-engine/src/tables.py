@@ -0,0 +1,170 @@
+"""
+Dataset files passed between the pipeline stages (cleaned_data,
+augmented_data, the scraped startups), in CSV or a columnar format.
+
+The format follows the file extension:
+- .csv      plain text, what every stage wrote so far (and the export format)
+- .parquet  compressed columns; string columns are dictionary-encoded
+- .feather  Arrow IPC (lz4), the fastest to load
+
+The columnar formats need pyarrow. read_table only decodes the requested
+columns there, and returns CATEGORICAL columns as pandas categoricals (for
+Parquet they are read straight into dictionaries, so repeated cities and
+industries are never materialized as separate strings). TableWriter writes
+chunk by chunk in every format, into a temp file that is renamed into place
+on close; for the columnar formats it needs the column types up front.
+"""
+import os
+
+import pandas as pd
+
+CSV = 'csv'
+PARQUET = 'parquet'
+FEATHER = 'feather'
+EXTENSIONS = {'.csv': CSV, '.parquet': PARQUET, '.feather': FEATHER}
+FORMATS = [CSV, PARQUET, FEATHER]
+
+# Low-cardinality text columns of the datasets
+CATEGORICAL = ['industry', 'city', 'source', 'status']
+# Column types of cleaned_data / augmented_data (funding amounts are read
+# back as floats from CSV too)
+FUNDING_DTYPES = {'pitch': 'string', 'funding_amount': 'float64', 'industry': 'string', 'city': 'string'}
+
+
+def table_format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise ValueError(f"Unsupported data format: {ext} (expected one of {', '.join(EXTENSIONS)})")
+    return EXTENSIONS[ext]
+
+
+def with_format(path, fmt):
+    # data/cleaned_data.csv -> data/cleaned_data.parquet
+    return f"{os.path.splitext(path)[0]}.{fmt}"
+
+
+def _require_arrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Parquet/Feather files need pyarrow (pip install pyarrow)") from e
+
+
+def read_table(path, columns=None, categorical=True, **csv_kwargs):
+    """
+    Reads a dataset file as a DataFrame, restricted to columns if given.
+    csv_kwargs are passed to pd.read_csv.
+    """
+    fmt = table_format(path)
+    if fmt == CSV:
+        df = pd.read_csv(path, usecols=columns, **csv_kwargs)
+    else:
+        _require_arrow()
+        if fmt == PARQUET:
+            import pyarrow.parquet as pq
+            table = pq.read_table(path, columns=columns, read_dictionary=CATEGORICAL if categorical else None)
+        else:
+            import pyarrow.feather as feather
+            table = feather.read_table(path, columns=columns)
+        df = table.to_pandas()
+        if columns is not None:
+            df = df[list(columns)]
+
+    if categorical:
+        for column in CATEGORICAL:
+            if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype('category')
+    return df
+
+
+class TableWriter:
+    """
+    Appends DataFrame chunks to one dataset file. Use as a context manager;
+    the file only appears (atomically) once the writer is closed without
+    an error.
+
+    dtypes ({column: pandas dtype}) fixes the stored type of each column.
+    The columnar formats require it: their schema is written with the first
+    chunk and cannot widen later (an int column turning float, say).
+    """
+
+    def __init__(self, path, dtypes=None):
+        self.path = path
+        self.format = table_format(path)
+        self.dtypes = dtypes
+        self.rows = 0
+        root, ext = os.path.splitext(path)
+        self.tmp_path = f"{root}.tmp{ext}"
+        self._writer = None
+        if self.format != CSV:
+            _require_arrow()
+            if dtypes is None:
+                raise ValueError(f"TableWriter needs the column dtypes for {self.format} files "
+                                 "(write_table takes them from the frame)")
+
+    def _arrow_table(self, chunk):
+        import pyarrow as pa
+
+        if self.dtypes:
+            chunk = chunk.astype({c: t for c, t in self.dtypes.items() if c in chunk.columns})
+        # Categoricals are stored as plain strings: the Parquet writer
+        # dictionary-encodes them per row group anyway, and chunks with
+        # different categories then share one schema
+        for column in chunk.columns:
+            if isinstance(chunk[column].dtype, pd.CategoricalDtype):
+                chunk[column] = chunk[column].astype('string')
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if self._writer is not None:
+            return table.cast(self._writer.schema)
+
+        # Columns that are all missing in the first chunk are text columns
+        schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                            for f in table.schema]).remove_metadata()
+        return table.cast(schema)
+
+    def write(self, chunk):
+        if self.format == CSV:
+            chunk.to_csv(self.tmp_path, index=False, mode='w' if self.rows == 0 else 'a', header=(self.rows == 0))
+        else:
+            table = self._arrow_table(chunk)
+            if self._writer is None:
+                self._writer = self._open(table.schema)
+            self._writer.write_table(table)
+        self.rows += len(chunk)
+
+    def _open(self, schema):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self.format == PARQUET:
+            return pq.ParquetWriter(self.tmp_path, schema, compression='zstd')
+        return pa.ipc.new_file(self.tmp_path, schema, options=pa.ipc.IpcWriteOptions(compression='lz4'))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_table(df, path, dtypes=None):
+    # One chunk: its own types are the schema
+    if dtypes is None:
+        dtypes = df.dtypes.astype(str).to_dict()
+    with TableWriter(path, dtypes) as writer:
+        writer.write(df)
@@ -1,79 +1,122 @@
+import argparse
 import pandas as pd
 import numpy as np
 import joblib
 import os
+import time
 
-from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_absolute_error, r2_score
 
+from feature_store import get_features
+from incremental import MAX_TREES, extend_forest, load_seen_rows, row_hashes, save_seen_rows, select_new_rows
+from model_artifact import export_artifact
+from model_search import (DEFAULT_REGRESSOR, DEFAULT_VECTORIZER, FEATURES, REGRESSORS, VECTORIZERS,
+                          build_regressor, format_results, needs_dense, search, write_report)
+from tables import FORMATS, read_table, with_format
+
 # --- CONFIGURATION ---
-DATA_PATH = '../data/augmented_data.csv'  # Path to the file we created in step 1
+DATA_PATH = '../data/augmented_data.csv'  # Path to the file we created in step 1 (or .parquet/.feather)
 MODEL_PATH = '../models/valuation_model.pkl'
+ARTIFACT_PATH = '../models/valuation_model.bin'  # Compact, mmap-able copy (see model_artifact.py)
+ROWS_PATH = '../models/valuation_model.rows.npy'  # Hashes of the rows the model has seen (see incremental.py)
 
-def train():
-    print("Starting Training Process...")
-    
-    # 1. Load Data
+def save_model(model, output_file):
+    # Write to a temp file and atomically swap it in, so running predictors
+    # never read a half-written pickle and see a new file version (which
+    # also invalidates their prediction caches)
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    tmp_file = f"{output_file}.tmp"
+    joblib.dump(model, tmp_file)
+    os.replace(tmp_file, output_file)
+
+def publish_model(model, base_dir, seen_hashes):
+    # The pickle goes first: until the artifact is replaced too, predict.py
+    # serves the (newer) pickle rather than the old artifact
+    output_file = os.path.join(base_dir, MODEL_PATH)
+    save_model(model, output_file)
+    print(f"Model saved to {output_file}")
+
+    artifact_file = os.path.join(base_dir, ARTIFACT_PATH)
+    try:
+        export_artifact(model, artifact_file)
+        print(f"Compact artifact saved to {artifact_file}")
+    except ValueError as e:
+        # Don't leave an artifact from an older model next to the new pickle
+        if os.path.exists(artifact_file):
+            os.remove(artifact_file)
+        print(f"Skipped compact artifact: {e}")
 
+    save_seen_rows(os.path.join(base_dir, ROWS_PATH), seen_hashes)
+
+def data_path(fmt='csv'):
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    data_file = os.path.join(base_dir, DATA_PATH)
-    
+    return with_format(os.path.join(base_dir, DATA_PATH), fmt)
+
+def load_data(data_file=None):
+    data_file = data_file or data_path()
+
     if not os.path.exists(data_file):
         print(f"Error: Data file not found at {data_file}")
-        return
+        return None
 
-    df = pd.read_csv(data_file)
+    df = read_table(data_file, columns=FEATURES + ['funding_amount'])
     print(f"Loaded {len(df)} rows of data.")
+    return df
 
-    # 2. Prepare Features (X) and Target (y)
-    X = df[['pitch', 'industry', 'city']]
-    
-    # --- CRITICAL: THE LOG TRANSFORM TO NORMALIZE ---
-    y = np.log1p(df['funding_amount']) 
+def run_search(folds=3, n_jobs=-1, vectorizers=None, regressors=None, report_file=None, data_file=None):
+    print("Starting Model Search...")
+    df = load_data(data_file)
+    if df is None:
+        return
 
-    # Split for validation
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    print(f"Cross-validating {len(vectorizers or VECTORIZERS)} vectorizers x "
+          f"{len(regressors or REGRESSORS)} regressors over {folds} folds...")
+    results = search(df, vectorizers, regressors, folds=folds, n_jobs=n_jobs)
+    print(format_results(results))
 
-    # 3. Define the Preprocessing Pipeline
-    # This teaches the model how to handle Text vs Categories automatically
-    
-    # A. Text Processing (The Pitch) -> TF-IDF
-    # We look for top 1000 keywords, and also pairs of words (ngrams) like "ai platform"
-    text_features = 'pitch'
-    text_transformer = TfidfVectorizer(max_features=1000, ngram_range=(1,2), stop_words='english')
-
-    # B. Category Processing (Industry, City) -> OneHot
-    # We convert "Bengaluru" into a binary vector [0, 0, 1, 0...]
-    categorical_features = ['industry', 'city']
-    categorical_transformer = OneHotEncoder(handle_unknown='ignore')
-
-    # Bundle them together
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('text', text_transformer, text_features),
-            ('cat', categorical_transformer, categorical_features)
-        ]
-    )
-
-    # 4. Define the Model
-    # RandomForest is robust and doesn't overfit easily on small data
+    if report_file:
+        write_report(results, report_file)
+        print(f"Report saved to {report_file}")
+    return results
+
+def train(vectorizer=DEFAULT_VECTORIZER, regressor=DEFAULT_REGRESSOR, feature_cache=True, refresh_features=False,
+          data_file=None):
+    print("Starting Training Process...")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+
+    # 1. Locate Data
+    data_file = data_file or data_path()
+    if not os.path.exists(data_file):
+        print(f"Error: Data file not found at {data_file}")
+        return
+
+    # 2-3. Features (X) and log Target (y), split for validation
+    # The pitch goes through TF-IDF, Industry/City are one-hot encoded. The
+    # fitted preprocessor and its matrices come from the feature store when
+    # the data and vectorizer settings are unchanged (see feature_store.py)
+    print(f"Candidate: {vectorizer} + {regressor}")
+    start = time.perf_counter()
+    features, cached = get_features(data_file, vectorizer, dense=needs_dense(regressor),
+                                    cache_dir=None if feature_cache else False, refresh=refresh_features)
+    source = "Loaded cached features" if cached else "Fitted preprocessor"
+    print(f"{source} for {features['n_rows']} rows in {time.perf_counter() - start:.2f}s.")
+    y_test = features['y_test']
+
+    # 4. Train the Model
+    # Defaults are a RandomForest on 1000 uni+bigram keywords; see model_search.py
+    # for the other candidates (python train_valuation.py --search compares them)
+    print("Training (this may take a moment)...")
+    estimator = build_regressor(regressor)
+    estimator.fit(features['X_train'], features['y_train'])
     model = Pipeline(steps=[
-        ('preprocessor', preprocessor),
-        ('regressor', RandomForestRegressor(n_estimators=100, max_depth=20, random_state=42, n_jobs=-1))
+        ('preprocessor', features['preprocessor']),
+        ('regressor', estimator)
     ])
 
-    # 5. Train the Model
-    print("Training Random Forest (this may take a moment)...")
-    model.fit(X_train, y_train)
-
-    # 6. Evaluate
+    # 5. Evaluate
     print("Evaluating...")
-    y_pred_log = model.predict(X_test)
+    y_pred_log = estimator.predict(features['X_test'])
     
     # Convert predictions BACK from Log scale to Dollars
     y_pred_dollars = np.expm1(y_pred_log)
@@ -84,11 +127,8 @@ def train():
     print(f"   Mean Absolute Error (Accuracy): ${mae:,.2f}")
     print(f"   (This is the average deviation from the actual funding amount)")
 
-    # 7. Save the Model
-    output_file = os.path.join(base_dir, MODEL_PATH)
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    joblib.dump(model, output_file)
-    print(f"Model saved to {output_file}")
+    # 6. Save the Model (and the rows it was built from, for later updates)
+    publish_model(model, base_dir, row_hashes(read_table(data_file, columns=FEATURES + ['funding_amount'])))
 
     # --- Quick Test ---
     print("\n🔍 Running a quick test inference...")
@@ -102,5 +142,59 @@ def train():
     print(f"   Input: {test_idea['pitch'][0]}")
     print(f"   Predicted Valuation: ${prediction_dollars:,.2f}")
 
+def update(new_data_file, max_trees=MAX_TREES):
+    # Incremental mode: add trees for the rows of new_data_file that the
+    # current model has not seen, instead of refitting on the full history
+    print("Starting Incremental Update...")
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    model_file = os.path.join(base_dir, MODEL_PATH)
+    seen = load_seen_rows(os.path.join(base_dir, ROWS_PATH))
+
+    if not os.path.exists(model_file) or seen is None:
+        print("Error: No trained model (or its row hashes) found. Run a full train first.")
+        return
+
+    df = read_table(new_data_file, columns=FEATURES + ['funding_amount'])
+    new_rows, new_hashes = select_new_rows(df, seen)
+    print(f"Loaded {len(df)} rows, {len(new_rows)} not seen by the model.")
+    if new_rows.empty:
+        print("Nothing to update.")
+        return
+
+    model = joblib.load(model_file)
+    try:
+        summary = extend_forest(model, new_rows, len(seen), max_trees)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"Update Complete.")
+    print(f"   Trees: {summary['trees_before']} -> {summary['trees_after']} (fit in {summary['fit_s']:.2f}s)")
+    print(f"   MAE on the new rows before the update: ${summary['mae_new_rows_before']:,.2f}")
+    publish_model(model, base_dir, np.concatenate([seen, new_hashes]))
+
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the valuation model, or compare candidates with --search")
+    parser.add_argument('--vectorizer', choices=list(VECTORIZERS), default=DEFAULT_VECTORIZER)
+    parser.add_argument('--regressor', choices=list(REGRESSORS), default=DEFAULT_REGRESSOR)
+    parser.add_argument('--search', action='store_true', help="Cross-validate all candidates instead of training one")
+    parser.add_argument('--folds', type=int, default=3)
+    parser.add_argument('--jobs', type=int, default=-1, help="Parallel workers for --search (-1 = all cores)")
+    parser.add_argument('--report', default=None, help="With --search, also write the results as JSON")
+    parser.add_argument('--update', metavar='CSV', default=None,
+                        help="Incrementally add the unseen rows of CSV (pitch, funding_amount, industry, city; "
+                             ".csv, .parquet or .feather)")
+    parser.add_argument('--max-trees', type=int, default=MAX_TREES, help="With --update, largest forest allowed")
+    parser.add_argument('--data', default=None, help="Training data (default: ../data/augmented_data.<format>)")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="Format of the default training data")
+    parser.add_argument('--no-feature-cache', action='store_true', help="Always refit the preprocessor")
+    parser.add_argument('--refresh-features', action='store_true', help="Refit the preprocessor and update the cache")
+    args = parser.parse_args()
+    data_file = args.data or data_path(args.format)
+
+    if args.search:
+        run_search(args.folds, args.jobs, report_file=args.report, data_file=data_file)
+    elif args.update:
+        update(args.update, args.max_trees)
+    else:
+        train(args.vectorizer, args.regressor, not args.no_feature_cache, args.refresh_features, data_file)
\ No newline at end of file
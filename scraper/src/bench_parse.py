@@ -0,0 +1,91 @@
+"""
+Parse benchmark for the HTML backends in parsers.py.
+
+Runs every backend over the saved fixtures in scraper/data, checks that they
+extract identical records, and reports ms/page and the speedup over the
+original 'soup' backend.
+
+Usage: python bench_parse.py [--repeat 20] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from parsers import PARSERS, parse_betalist, parse_failory
+
+FIXTURES = [
+    ('failory_debug.html', 'failory'),
+    ('failory_debug_new.html', 'failory'),
+    ('betalist_home_debug.html', 'betalist'),
+]
+
+BASE_URLS = {
+    'failory': 'https://www.failory.com',
+    'betalist': 'https://betalist.com',
+}
+
+
+def _parse(kind, content, parser):
+    if kind == 'failory':
+        return parse_failory(content, BASE_URLS[kind], parser)
+    return parse_betalist(content, BASE_URLS[kind], parser)
+
+
+def bench_fixture(path, kind, repeat):
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    results = {}
+    timings = {}
+    for parser in PARSERS:
+        results[parser] = _parse(kind, content, parser)  # warm-up + correctness
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _parse(kind, content, parser)
+            samples.append(time.perf_counter() - start)
+        timings[parser] = statistics.median(samples) * 1000
+
+    reference = results['soup']
+    records = reference[0] if kind == 'failory' else reference
+    return {
+        'fixture': os.path.basename(path),
+        'bytes': len(content),
+        'records': len(records),
+        'identical': all(results[p] == reference for p in PARSERS),
+        'ms_per_page': {p: round(t, 3) for p, t in timings.items()},
+        'speedup_vs_soup': {p: round(timings['soup'] / t, 2) for p, t in timings.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parsing backends on saved fixtures.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+    args = parser.parse_args(argv)
+
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+    report = [
+        bench_fixture(os.path.join(data_dir, name), kind, args.repeat)
+        for name, kind in FIXTURES
+        if os.path.exists(os.path.join(data_dir, name))
+    ]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for row in report:
+            print(f"{row['fixture']} ({row['bytes']:,} bytes, {row['records']} records, "
+                  f"identical={row['identical']})")
+            for p in PARSERS:
+                print(f"   {p:<9} {row['ms_per_page'][p]:>8.2f} ms/page   x{row['speedup_vs_soup'][p]}")
+
+    # Non-zero exit if any backend disagrees, so this doubles as a check
+    return 0 if all(row['identical'] for row in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
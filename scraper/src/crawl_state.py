@@ -0,0 +1,96 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns that identify one record across runs. Names alone are not unique
+# (YC has several "Apollo"s), and the website is the stable profile link
+# for Failory/BetaList.
+RECORD_KEY = ('source', 'name', 'website')
+
+
+def content_hash(content) -> str:
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class CrawlState:
+    """
+    Persisted per-source crawl state for incremental runs.
+    Layout: {source: {unit: {"hash": ..., "updated": ..., ...extra}}}
+    where a unit is a page URL, a YC batch or a BetaList topic.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.sources: Dict[str, Dict[str, Dict]] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.sources = json.load(f)
+
+    def get(self, source: str, unit: str) -> Dict:
+        with self.lock:
+            return dict(self.sources.get(source, {}).get(unit, {}))
+
+    def is_unchanged(self, source: str, unit: str, digest: str) -> bool:
+        return self.get(source, unit).get('hash') == digest
+
+    def record(self, source: str, unit: str, digest: Optional[str] = None, **extra):
+        with self.lock:
+            entry = self.sources.setdefault(source, {}).setdefault(unit, {})
+            if digest is not None:
+                entry['hash'] = digest
+            entry.update(extra)
+            entry['updated'] = int(time.time())
+
+    def save(self):
+        with self.lock:
+            payload = json.dumps(self.sources, indent=2, sort_keys=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.path)
+
+
+def merge_records(existing: pd.DataFrame, records: List[Dict],
+                  key: Sequence[str] = RECORD_KEY) -> Tuple[pd.DataFrame, int, int]:
+    """
+    Upserts freshly scraped records into the existing output.
+    Records that match an existing row (by key) replace it in place, new ones
+    are appended, and rows not seen in this run are kept untouched.
+    Returns (merged frame, added count, updated count).
+    """
+    key = list(key)
+    new = pd.DataFrame(records)
+    if new.empty:
+        return existing, 0, 0
+
+    columns = list(existing.columns) + [c for c in new.columns if c not in existing.columns]
+    existing = existing.reindex(columns=columns).reset_index(drop=True)
+    new = new.reindex(columns=columns).drop_duplicates(subset=key, keep='last').reset_index(drop=True)
+
+    existing_keys = pd.MultiIndex.from_frame(existing[key].astype(str))
+    new_keys = pd.MultiIndex.from_frame(new[key].astype(str))
+    matched = new_keys.isin(existing_keys)
+
+    # A record keeps the position of the row it replaces; new ones go last
+    existing = existing.assign(_pos=np.arange(len(existing), dtype=float))
+    first_pos = pd.Series(existing['_pos'].values, index=existing_keys)
+    first_pos = first_pos[~first_pos.index.duplicated(keep='first')]
+    new = new.assign(_pos=first_pos.reindex(new_keys).values)
+    new.loc[~matched, '_pos'] = len(existing) + np.arange((~matched).sum())
+
+    combined = pd.concat([existing, new], ignore_index=True)
+    combined = combined.drop_duplicates(subset=key, keep='last')
+    combined = combined.sort_values('_pos', kind='stable').drop(columns='_pos')
+    return combined.reset_index(drop=True), int((~matched).sum()), int(matched.sum())
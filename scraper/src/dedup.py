@@ -0,0 +1,310 @@
+"""
+Cross-source de-duplication / entity resolution for scraped startups.
+
+YC, Failory and BetaList often list the same company. Records are linked by:
+1. the same website domain (ignoring the Failory/BetaList profile links),
+2. the same normalized name,
+3. similar names (character trigram Jaccard >= threshold).
+Names alone are not trusted when both sides have conflicting domains
+(YC has several unrelated "Apollo"s). When a side has no own domain (Failory
+and BetaList only link to their profile pages), a name match also needs
+corroboration: the same batch, or descriptions sharing at least
+DESCRIPTION_THRESHOLD of their words. Such a row is only attached when
+exactly one cluster corroborates it, and it never overrides a YC row's status.
+
+Fuzzy matching never compares all pairs. Names are blocked on trigrams
+through an inverted index, and very common trigrams are skipped, so the cost
+grows with the size of the candidate blocks rather than n².
+
+Usage: python dedup.py [input] [-o output] [--threshold 0.85]
+"""
+import argparse
+import logging
+import os
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from sinks import read_records, write_records
+
+logger = logging.getLogger(__name__)
+
+# Listing sites whose links are profile pages, not the company's own domain
+AGGREGATOR_DOMAINS = {'failory.com', 'betalist.com', 'ycombinator.com'}
+
+LEGAL_SUFFIXES = {'inc', 'llc', 'ltd', 'limited', 'corp', 'corporation', 'co', 'gmbh', 'sa', 'srl', 'pvt', 'plc'}
+
+# When records merge, fields come from the first source in this order that has them.
+# Failory goes first for status: "Failed"/"Acquired" says more than YC's default "Active",
+# but only from rows that corroborate the YC row beyond the name (see merge_cluster).
+FIELD_PRIORITY = {
+    'name': ['Y Combinator', 'BetaList', 'Failory'],
+    'description': ['Y Combinator', 'BetaList', 'Failory'],
+    'status': ['Failory', 'Y Combinator', 'BetaList'],
+    'batch': ['Y Combinator', 'Failory', 'BetaList'],
+}
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+# Word Jaccard of two descriptions above which a name match without a
+# domain is accepted
+DESCRIPTION_THRESHOLD = 0.2
+DESCRIPTION_STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'that', 'your', 'from', 'into', 'are', 'our', 'you', 'all', 'its',
+    'who', 'can', 'has', 'have', 'their', 'this', 'was', 'were', 'been', 'more', 'than',
+}
+
+
+def normalize_name(name) -> str:
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii').lower()
+    tokens = _NON_ALNUM.sub(' ', name).split()
+    while len(tokens) > 1 and tokens[-1] in LEGAL_SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+def website_domain(url) -> Optional[str]:
+    if not isinstance(url, str) or not url.strip():
+        return None
+    url = url.strip().lower()
+    if '://' not in url:
+        url = f"http://{url}"
+    host = urlsplit(url).hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if not host or any(host == d or host.endswith(f".{d}") for d in AGGREGATOR_DOMAINS):
+        return None
+    return host
+
+
+def description_words(description) -> Set[str]:
+    if not isinstance(description, str):
+        return set()
+    return {w for w in _NON_ALNUM.sub(' ', description.lower()).split()
+            if len(w) > 2 and w not in DESCRIPTION_STOP_WORDS}
+
+
+def word_similarity(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def trigrams(key: str) -> Set[str]:
+    compact = key.replace(' ', '')
+    if len(compact) < 3:
+        return {compact} if compact else set()
+    return {compact[i:i + 3] for i in range(len(compact) - 2)}
+
+
+class _Clusters:
+    """
+    Union-find that refuses to join clusters with conflicting domains.
+    """
+
+    def __init__(self, domains: List[Optional[str]]):
+        self.parent = list(range(len(domains)))
+        self.domains = [{d} if d else set() for d in domains]
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return False
+        di, dj = self.domains[ri], self.domains[rj]
+        if di and dj and not (di & dj):
+            return False
+        self.parent[rj] = ri
+        self.domains[ri] = di | dj
+        return True
+
+
+def find_duplicates(df: pd.DataFrame, threshold: float = 0.85, max_block: int = 300,
+                    description_threshold: float = DESCRIPTION_THRESHOLD) -> List[int]:
+    """
+    Returns a cluster id per row; rows sharing an id are the same company.
+    """
+    keys = [normalize_name(n) for n in df['name']]
+    domains = [website_domain(w) for w in df['website']]
+    batches = [b if isinstance(b, str) and b.strip() else None for b in df.get('batch', [None] * len(df))]
+    words = [description_words(d) for d in df.get('description', [None] * len(df))]
+    clusters = _Clusters(domains)
+
+    def corroborated(i: int, j: int) -> bool:
+        # Both domains known: union() already refuses a conflict
+        if domains[i] and domains[j]:
+            return True
+        if batches[i] and batches[j]:
+            return batches[i] == batches[j]
+        return word_similarity(words[i], words[j]) >= description_threshold
+
+    def link_by_name(candidates: Dict[int, Set[int]]) -> int:
+        # candidates: row -> rows it matches by name
+        linked = 0
+        # Rows with a domain link to each other (union refuses conflicts), and
+        # listing-only rows (no domain, no batch) to their corroborated copies
+        for i, others in candidates.items():
+            for j in others:
+                if (domains[i] and domains[j]) or (
+                        not (domains[i] or batches[i] or domains[j] or batches[j]) and corroborated(i, j)):
+                    linked += clusters.union(i, j)
+        # Any other row without a domain attaches only when its corroborated
+        # matches form exactly one cluster besides its own
+        for i, others in candidates.items():
+            if domains[i]:
+                continue
+            matches = [j for j in others if corroborated(i, j) and clusters.find(j) != clusters.find(i)]
+            if len({clusters.find(j) for j in matches}) == 1:
+                linked += clusters.union(i, matches[0])
+        return linked
+
+    # 1. Same domain
+    by_domain: Dict[str, List[int]] = defaultdict(list)
+    for i, d in enumerate(domains):
+        if d:
+            by_domain[d].append(i)
+    for rows in by_domain.values():
+        for j in rows[1:]:
+            clusters.union(rows[0], j)
+
+    # 2. Same normalized name (union refuses domain conflicts)
+    by_key: Dict[str, List[int]] = defaultdict(list)
+    for i, k in enumerate(keys):
+        if k:
+            by_key[k].append(i)
+    same_name: Dict[int, Set[int]] = {}
+    for rows in by_key.values():
+        for i in rows:
+            same_name[i] = set(rows) - {i}
+    link_by_name(same_name)
+
+    # 3. Similar names, one representative per distinct key, blocked on trigrams
+    distinct = list(by_key)
+    grams = [trigrams(k) for k in distinct]
+    index: Dict[str, List[int]] = defaultdict(list)
+    for idx, gs in enumerate(grams):
+        for g in gs:
+            index[g].append(idx)
+
+    similar_names: Dict[int, Set[int]] = defaultdict(set)
+    for idx, gs in enumerate(grams):
+        if len(gs) < 2:
+            continue
+        shared: Dict[int, int] = defaultdict(int)
+        for g in gs:
+            postings = index[g]
+            if len(postings) > max_block:
+                # Too common to discriminate ("app", "ing", ...)
+                continue
+            for other in postings:
+                if other > idx:
+                    shared[other] += 1
+        for other, common in shared.items():
+            union_size = len(gs) + len(grams[other]) - common
+            if common / union_size >= threshold:
+                for i in by_key[distinct[idx]]:
+                    similar_names[i].update(by_key[distinct[other]])
+                for j in by_key[distinct[other]]:
+                    similar_names[j].update(by_key[distinct[idx]])
+    linked = link_by_name(similar_names)
+
+    logger.info(f"Fuzzy matching linked {linked} name variants.")
+    return [clusters.find(i) for i in range(len(df))]
+
+
+def _pick(rows: List[Dict], column: str):
+    order = FIELD_PRIORITY.get(column, [])
+    rank = {source: i for i, source in enumerate(order)}
+    for row in sorted(rows, key=lambda r: rank.get(r.get('source'), len(order))):
+        value = row.get(column)
+        if isinstance(value, str) and value.strip():
+            return value
+    return None
+
+
+def merge_cluster(rows: List[Dict]) -> Dict:
+    """
+    Builds the canonical record for one cluster of duplicate rows.
+    """
+    # Prefer the company's own site over a listing profile link
+    websites = [r.get('website') for r in rows if isinstance(r.get('website'), str) and r.get('website')]
+    own_sites = [w for w in websites if website_domain(w)]
+    sources = sorted({r.get('source') for r in rows if isinstance(r.get('source'), str)})
+
+    record = {column: _pick(rows, column) for column in FIELD_PRIORITY}
+
+    # A row that matches a YC row by name only must not override its status
+    yc_rows = [r for r in rows if r.get('source') == 'Y Combinator']
+    if yc_rows:
+        yc_domains = {website_domain(r.get('website')) for r in yc_rows} - {None}
+        yc_words = [description_words(r.get('description')) for r in yc_rows]
+
+        def vouched(row: Dict) -> bool:
+            if row.get('source') == 'Y Combinator' or website_domain(row.get('website')) in yc_domains:
+                return True
+            words = description_words(row.get('description'))
+            return any(word_similarity(words, w) >= DESCRIPTION_THRESHOLD for w in yc_words)
+
+        record['status'] = _pick([r for r in rows if vouched(r)], 'status')
+    record['website'] = (own_sites or websites or [None])[0]
+    record['source'] = '; '.join(sources)
+    return record
+
+
+def deduplicate(df: pd.DataFrame, threshold: float = 0.85) -> Tuple[pd.DataFrame, int]:
+    """
+    Collapses duplicate companies into canonical records.
+    Returns (deduplicated frame, number of rows merged away).
+    """
+    df = df.reset_index(drop=True)
+    cluster_ids = pd.Series(find_duplicates(df, threshold), index=df.index)
+
+    # Each cluster is represented by its first row, in original order;
+    # only clusters with several rows need the (slower) field-by-field merge
+    first_rows = cluster_ids.drop_duplicates()
+    first_of = pd.Series(first_rows.index, index=first_rows.values)
+    out = df.loc[first_rows.index].copy()
+
+    in_multi = cluster_ids.duplicated(keep=False)
+    if in_multi.any():
+        groups: Dict[int, List[Dict]] = defaultdict(list)
+        for cid, row in zip(cluster_ids[in_multi], df[in_multi].to_dict('records')):
+            groups[cid].append(row)
+        merged = pd.DataFrame.from_dict({cid: merge_cluster(rows) for cid, rows in groups.items()}, orient='index')
+        merged.index = first_of[merged.index].values
+        out = out.astype({c: object for c in merged.columns if c in out.columns})
+        out.loc[merged.index, merged.columns] = merged.values
+
+    return out.reset_index(drop=True), len(df) - len(out)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+    parser = argparse.ArgumentParser(description="Merge duplicate companies across scraped sources.")
+    parser.add_argument('input', nargs='?', default=os.path.join(data_dir, 'startups.csv'))
+    parser.add_argument('-o', '--output', default=None, help="Defaults to <input>_dedup.<ext>")
+    parser.add_argument('--threshold', type=float, default=0.85, help="Trigram Jaccard threshold for fuzzy names")
+    args = parser.parse_args(argv)
+
+    root, ext = os.path.splitext(args.input)
+    output = args.output or f"{root}_dedup{ext}"
+
+    df = read_records(args.input)
+    deduped, removed = deduplicate(df, args.threshold)
+    write_records(deduped, output)
+    logger.info(f"De-duplicated {len(df)} -> {len(deduped)} records ({removed} merged). Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
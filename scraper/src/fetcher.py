@@ -0,0 +1,155 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HTTPCache
+
+logger = logging.getLogger(__name__)
+
+# Statuses worth retrying later (rate limited / server trouble)
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TransientFetchError(Exception):
+    """
+    A fetch failed in a way that may succeed on retry (network error,
+    429 or 5xx). The orchestrator retries sources that raise this.
+    """
+
+
+class TokenBucket:
+    """
+    Classic token bucket: refills at `rate` tokens per second up to `capacity`.
+    acquire() blocks until a token is available, which spaces requests out
+    without the fixed sleeps the scrapers used to have.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+
+class Fetcher:
+    """
+    Shared HTTP engine for all scrapers.
+    - One keep-alive requests.Session with a connection pool
+    - Thread pools to fetch independent URLs in parallel (map), one per
+      named pool so a source waiting on its own host's limits never holds
+      the threads another source needs
+    - Per-host concurrency limit and token-bucket rate limit, so parallel
+      fetching stays polite to each site
+    - Optional on-disk HTTPCache for conditional GETs (incremental crawls)
+    """
+
+    def __init__(self, headers: Optional[Dict] = None, max_workers: int = 8,
+                 per_host_limit: int = 4, rate: float = 5.0, burst: float = 1.0,
+                 host_limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 timeout: float = 30, cache: Optional[HTTPCache] = None):
+        self.max_workers = max_workers
+        self.per_host_limit = per_host_limit
+        self.rate = rate
+        self.burst = burst
+        # host -> (max concurrent requests, requests per second)
+        self.host_limits = host_limits or {}
+        self.timeout = timeout
+        self.cache = cache
+
+        self.session = requests.Session()
+        if headers:
+            self.session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._hosts: Dict[str, Tuple[threading.Semaphore, TokenBucket]] = {}
+        self._hosts_lock = threading.Lock()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._executors_lock = threading.Lock()
+
+    def _host_guard(self, url: str) -> Tuple[threading.Semaphore, TokenBucket]:
+        host = urlsplit(url).netloc
+        with self._hosts_lock:
+            if host not in self._hosts:
+                limit, rate = self.host_limits.get(host, (self.per_host_limit, self.rate))
+                self._hosts[host] = (threading.Semaphore(limit), TokenBucket(rate, self.burst))
+            return self._hosts[host]
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        semaphore, bucket = self._host_guard(url)
+        kwargs.setdefault('timeout', self.timeout)
+
+        cache_key = None
+        if self.cache is not None and method in self.cache.methods:
+            cache_key = self.cache.key(method, url, kwargs.get('json', kwargs.get('data')))
+            kwargs['headers'] = {**(kwargs.get('headers') or {}), **self.cache.conditional_headers(cache_key)}
+
+        with semaphore:
+            bucket.acquire()
+            response = self.session.request(method, url, **kwargs)
+
+        if cache_key is not None:
+            if response.status_code == 304:
+                response = self.cache.replay(cache_key, response)
+            elif response.status_code == 200:
+                self.cache.store(cache_key, response)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def _executor(self, pool: str) -> ThreadPoolExecutor:
+        with self._executors_lock:
+            if pool not in self._executors:
+                self._executors[pool] = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                           thread_name_prefix=f'fetch-{pool}')
+            return self._executors[pool]
+
+    def map(self, fn: Callable, items: Iterable, pool: str = 'default') -> List:
+        """
+        Runs fn over items on the named fetch thread pool and returns the
+        results in input order. fn should do its own error handling; an
+        exception escaping fn is re-raised here.
+        """
+        return list(self._executor(pool).map(fn, items))
+
+    def imap(self, fn: Callable, items: Iterable, pool: str = 'default') -> Iterator:
+        """
+        Like map, but yields results in input order as they become available,
+        so callers can stream them out instead of holding all of them.
+        """
+        return self._executor(pool).map(fn, items)
+
+    def close(self):
+        with self._executors_lock:
+            executors = list(self._executors.values())
+        for executor in executors:
+            executor.shutdown(wait=True)
+        self.session.close()
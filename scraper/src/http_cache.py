@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPCache:
+    """
+    On-disk HTTP cache for conditional requests.
+    Each entry is a body file plus a small JSON file with the validators
+    (ETag / Last-Modified) the server sent. The Fetcher sends them back as
+    If-None-Match / If-Modified-Since and, on a 304, replays the stored body.
+    """
+
+    def __init__(self, directory: str, methods=('GET',)):
+        self.directory = directory
+        self.methods = set(methods)
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, method: str, url: str, body=None) -> str:
+        if body is not None and not isinstance(body, (bytes, str)):
+            body = json.dumps(body, sort_keys=True)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        digest = hashlib.sha256(f"{method} {url}".encode('utf-8'))
+        if body:
+            digest.update(b'\n' + body)
+        return digest.hexdigest()
+
+    def _paths(self, key: str):
+        base = os.path.join(self.directory, key)
+        return f"{base}.json", f"{base}.body"
+
+    def _load_meta(self, key: str) -> Optional[Dict]:
+        meta_path, body_path = self._paths(key)
+        if not (os.path.exists(meta_path) and os.path.exists(body_path)):
+            return None
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def conditional_headers(self, key: str) -> Dict[str, str]:
+        meta = self._load_meta(key)
+        if not meta:
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def store(self, key: str, response: requests.Response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified):
+            # Nothing to revalidate with, so caching would not save a download
+            return
+
+        meta_path, body_path = self._paths(key)
+        meta = {
+            'url': response.url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': response.encoding,
+            'headers': dict(response.headers),
+        }
+        # Body first, metadata last: an entry only counts once both exist
+        _atomic_write(body_path, response.content)
+        _atomic_write(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def replay(self, key: str, not_modified: requests.Response) -> requests.Response:
+        """
+        Builds a 200 response from the cached body for a 304 answer.
+        """
+        meta = self._load_meta(key)
+        if meta is None:
+            return not_modified
+        _, body_path = self._paths(key)
+        with open(body_path, 'rb') as f:
+            content = f.read()
+
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response.headers = CaseInsensitiveDict(meta.get('headers') or {})
+        response.encoding = meta.get('encoding')
+        response.url = meta.get('url') or not_modified.url
+        response.request = not_modified.request
+        response.from_cache = True
+        return response
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,182 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from fetcher import TransientFetchError
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Source:
+    name: str
+    run: Callable[[], None]
+    timeout: Optional[float] = None
+    retries: int = 2
+    started: Optional[float] = None
+    baseline: int = 0
+
+
+@dataclass
+class SourceResult:
+    name: str
+    status: str = 'pending'  # ok | failed | timeout
+    seconds: float = 0.0
+    records: int = 0
+    attempts: int = 0
+    error: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'status': self.status,
+            'seconds': round(self.seconds, 3),
+            'records': self.records,
+            'attempts': self.attempts,
+            'error': self.error,
+        }
+
+
+@dataclass
+class RunSummary:
+    results: List[SourceResult] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return all(r.status == 'ok' for r in self.results)
+
+    def as_dict(self) -> Dict:
+        return {
+            'ok': self.ok,
+            'seconds': round(self.seconds, 3),
+            'records': sum(r.records for r in self.results),
+            'sources': [r.as_dict() for r in self.results],
+        }
+
+    def format(self) -> str:
+        lines = [f"{'source':<12} {'status':<8} {'seconds':>8} {'records':>8} {'attempts':>8}"]
+        for r in self.results:
+            line = f"{r.name:<12} {r.status:<8} {r.seconds:>8.2f} {r.records:>8} {r.attempts:>8}"
+            if r.error:
+                line += f"  ({r.error})"
+            lines.append(line)
+        lines.append(f"Total: {sum(r.records for r in self.results)} records in {self.seconds:.2f}s")
+        return '\n'.join(lines)
+
+
+class Orchestrator:
+    """
+    Runs registered sources concurrently on a thread pool.
+    - Transient failures (TransientFetchError, requests errors) are retried
+      with exponential backoff; anything else fails the source right away.
+    - A source that runs past its timeout is reported as 'timeout' and its
+      on_timeout callback is invoked so it can stop cooperatively (Python
+      threads cannot be killed). run() then waits up to `grace` seconds for
+      it to actually stop, so nothing is still writing once it returns.
+    Total crawl time becomes that of the slowest source instead of the sum.
+    """
+
+    def __init__(self, record_counter: Optional[Callable[[str], int]] = None,
+                 on_timeout: Optional[Callable[[str], None]] = None,
+                 max_workers: Optional[int] = None, backoff: float = 2.0, grace: float = 30.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.record_counter = record_counter or (lambda name: 0)
+        self.on_timeout = on_timeout or (lambda name: None)
+        self.max_workers = max_workers
+        self.backoff = backoff
+        self.grace = grace
+        self.sleep = sleep
+        self.sources: List[Source] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, run: Callable[[], None], timeout: Optional[float] = None, retries: int = 2):
+        self.sources.append(Source(name, run, timeout, retries))
+
+    def _run_source(self, source: Source, result: SourceResult) -> SourceResult:
+        with self._lock:
+            source.started = time.monotonic()
+            source.baseline = self.record_counter(source.name)
+
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                source.run()
+                status, error = 'ok', None
+                break
+            except (TransientFetchError, requests.RequestException) as e:
+                status, error = 'failed', str(e)
+                if attempts > source.retries or result.status == 'timeout':
+                    break
+                delay = self.backoff * 2 ** (attempts - 1) * random.uniform(0.5, 1.5)
+                logger.warning(f"{source.name}: transient failure ({e}), retrying in {delay:.1f}s")
+                self.sleep(delay)
+            except Exception as e:
+                status, error = 'failed', f"{type(e).__name__}: {e}"
+                break
+
+        with self._lock:
+            result.attempts = attempts
+            # A source that already timed out keeps that verdict
+            if result.status != 'timeout':
+                result.status = status
+                result.error = error
+                result.seconds = time.monotonic() - source.started
+                result.records = self.record_counter(source.name) - source.baseline
+        return result
+
+    def run(self) -> RunSummary:
+        started = time.monotonic()
+        results = {s.name: SourceResult(s.name) for s in self.sources}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers or max(len(self.sources), 1),
+                                      thread_name_prefix='source')
+        futures = {executor.submit(self._run_source, s, results[s.name]): s for s in self.sources}
+        pending = set(futures)
+        timed_out = set()
+
+        while pending:
+            # Wake up for the nearest deadline, or at least once a second
+            # so sources that start late (max_workers < sources) get one too
+            now = time.monotonic()
+            wait_for = 1.0
+            with self._lock:
+                for f in pending:
+                    source = futures[f]
+                    if source.timeout is not None and source.started is not None:
+                        wait_for = min(wait_for, max(source.started + source.timeout - now, 0))
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for f in done:
+                f.result()
+
+            now = time.monotonic()
+            for f in list(pending):
+                source = futures[f]
+                if source.timeout is None or source.started is None:
+                    continue
+                if now - source.started >= source.timeout:
+                    pending.discard(f)
+                    timed_out.add(f)
+                    result = results[source.name]
+                    with self._lock:
+                        result.status = 'timeout'
+                        result.error = f"timed out after {source.timeout:.0f}s"
+                        result.seconds = now - source.started
+                        result.records = self.record_counter(source.name) - source.baseline
+                    logger.error(f"{source.name}: {result.error}")
+                    self.on_timeout(source.name)
+
+        # Cancelled sources stop after their current request
+        if timed_out:
+            _, running = wait(timed_out, timeout=self.grace)
+            for f in running:
+                logger.error(f"{futures[f].name}: still running {self.grace:.0f}s after its timeout")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return RunSummary([results[s.name] for s in self.sources], time.monotonic() - started)
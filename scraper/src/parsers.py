@@ -0,0 +1,197 @@
+"""
+HTML extraction for the Failory and BetaList scrapers.
+
+Three interchangeable backends produce identical records:
+- 'lxml'     : lxml.html with precompiled XPath expressions (fastest)
+- 'strainer' : BeautifulSoup on lxml, parsing only the card/pagination tags
+- 'soup'     : the original full BeautifulSoup(html.parser) walk
+
+bench_parse.py compares them on the saved fixtures in scraper/data; replay.py
+runs the whole scraper against those fixtures and checks its records.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
+
+PARSERS = ('lxml', 'strainer', 'soup')
+DEFAULT_PARSER = 'lxml'
+
+
+def _has_class(name: str) -> str:
+    # XPath equivalent of BeautifulSoup's class_ match on one class token
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# --- Precompiled XPath (lxml backend) ---
+
+_FAILORY_CARDS = etree.XPath(f"//a[{_has_class('cemetery-card-link-block')}]")
+_FAILORY_NAME = etree.XPath(f".//*[{_has_class('card-title-black')}]")
+_FAILORY_DESC = etree.XPath(f".//*[{_has_class('card-date-black')}]")
+_FAILORY_OUTCOME = etree.XPath(".//*[@fs-list-field='outcome']")
+_FAILORY_NEXT = etree.XPath(f"//a[{_has_class('w-pagination-next')}]")
+
+_BETALIST_CARDS = etree.XPath("//div[starts-with(@id, 'startup-')]")
+_BETALIST_NAME = etree.XPath(f".//a[{_has_class('font-medium')}]")
+_BETALIST_DESC = etree.XPath(f".//a[{_has_class('text-gray-500')}]")
+
+# --- Strainers (strainer backend) ---
+
+def _class_token(*names: str):
+    # Strainers see the raw class attribute while parsing (one string such as
+    # "cemetery-card-link-block homepage w-inline-block"), so match on tokens
+    def match(value) -> bool:
+        if not value:
+            return False
+        tokens = value.split() if isinstance(value, str) else value
+        return any(name in tokens for name in names)
+    return match
+
+_FAILORY_STRAINER = SoupStrainer('a', class_=_class_token('cemetery-card-link-block', 'w-pagination-next'))
+_BETALIST_STRAINER = SoupStrainer('div', id=lambda x: x and x.startswith('startup-'))
+
+
+def _first(xpath, node):
+    found = xpath(node)
+    return found[0] if found else None
+
+
+def _failory_record(name: str, description: Optional[str], href: Optional[str],
+                    outcome: Optional[str], base_url: str) -> Dict:
+    return {
+        'name': name,
+        'description': description,
+        'source': 'Failory',
+        # Failory is about failed startups, but some might be acquired
+        'status': outcome if outcome is not None else 'Failed',
+        'website': f"{base_url}{href}" if href else None,
+        'batch': None
+    }
+
+
+def _betalist_record(name: str, description: Optional[str], href: str, base_url: str) -> Dict:
+    return {
+        'name': name,
+        'description': description,
+        'source': 'BetaList',
+        'status': 'Active', # BetaList is for new startups
+        'website': f"{base_url}{href}", # This is the BetaList profile link. The actual site is on that page.
+        'batch': None
+    }
+
+
+# --- Failory ---
+
+def _parse_failory_lxml(content: bytes, base_url: str) -> Tuple[List[Dict], Optional[str]]:
+    root = lxml.html.document_fromstring(content)
+    records = []
+    for card in _FAILORY_CARDS(root):
+        name_tag = _first(_FAILORY_NAME, card)
+        if name_tag is None:
+            continue
+        desc_tag = _first(_FAILORY_DESC, card)
+        outcome_tag = _first(_FAILORY_OUTCOME, card)
+        records.append(_failory_record(
+            name_tag.text_content().strip(),
+            desc_tag.text_content().strip() if desc_tag is not None else None,
+            card.get('href'),
+            outcome_tag.text_content().strip() if outcome_tag is not None else None,
+            base_url
+        ))
+
+    next_button = _first(_FAILORY_NEXT, root)
+    return records, next_button.get('href') if next_button is not None else None
+
+
+def _parse_failory_soup(soup: BeautifulSoup, base_url: str) -> Tuple[List[Dict], Optional[str]]:
+    records = []
+    # Cards are in 'a' tags with class 'cemetery-card-link-block'
+    for card in soup.find_all('a', class_='cemetery-card-link-block'):
+        # Name is usually in h3 or div with class 'card-title-black'
+        name_tag = card.find(class_='card-title-black')
+        if not name_tag:
+            continue
+        # Based on debug HTML, description is in 'card-date-black'
+        desc_tag = card.find(class_='card-date-black')
+        # In the debug HTML, there are hidden fields like fs-list-field="outcome"
+        outcome_tag = card.find(attrs={"fs-list-field": "outcome"})
+        records.append(_failory_record(
+            name_tag.text.strip(),
+            desc_tag.text.strip() if desc_tag else None,
+            card.get('href'),
+            outcome_tag.text.strip() if outcome_tag else None,
+            base_url
+        ))
+
+    next_button = soup.find('a', class_='w-pagination-next')
+    return records, next_button.get('href') if next_button else None
+
+
+def parse_failory(content: bytes, base_url: str, parser: str = DEFAULT_PARSER) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Extracts the startup cards of one Failory cemetery page.
+    Returns (records, href of the 'Next' pagination link or None).
+    """
+    if parser == 'lxml':
+        return _parse_failory_lxml(content, base_url)
+    if parser == 'strainer':
+        return _parse_failory_soup(BeautifulSoup(content, 'lxml', parse_only=_FAILORY_STRAINER), base_url)
+    if parser == 'soup':
+        return _parse_failory_soup(BeautifulSoup(content, 'html.parser'), base_url)
+    raise ValueError(f"Unknown parser: {parser} (expected one of {', '.join(PARSERS)})")
+
+
+# --- BetaList ---
+
+def _parse_betalist_lxml(content: bytes, base_url: str) -> List[Dict]:
+    root = lxml.html.document_fromstring(content)
+    records = []
+    for card in _BETALIST_CARDS(root):
+        name_tag = _first(_BETALIST_NAME, card)
+        if name_tag is None:
+            continue
+        desc_tag = _first(_BETALIST_DESC, card)
+        records.append(_betalist_record(
+            name_tag.text_content().strip(),
+            desc_tag.text_content().strip() if desc_tag is not None else None,
+            name_tag.get('href'),
+            base_url
+        ))
+    return records
+
+
+def _parse_betalist_soup(soup: BeautifulSoup, base_url: str) -> List[Dict]:
+    records = []
+    # Startups are usually in a div with id starting with 'startup-' inside a grid
+    # Based on debug HTML: <div class="block" id="startup-140720">
+    for card in soup.find_all('div', id=lambda x: x and x.startswith('startup-')):
+        # Name is in an 'a' tag with class 'font-medium'
+        # <a ... href="/startups/mindpali">Mindpali</a>
+        name_tag = card.find('a', class_='font-medium')
+        if not name_tag:
+            continue
+        # Description is in the next 'a' tag or div
+        # <a class="block text-gray-500..." href="...">Turn study notes...</a>
+        desc_tag = card.find('a', class_='text-gray-500')
+        records.append(_betalist_record(
+            name_tag.text.strip(),
+            desc_tag.text.strip() if desc_tag else None,
+            name_tag['href'],
+            base_url
+        ))
+    return records
+
+
+def parse_betalist(content: bytes, base_url: str, parser: str = DEFAULT_PARSER) -> List[Dict]:
+    """
+    Extracts the startup cards of one BetaList page (homepage or topic).
+    Records are returned in page order; de-duplication is up to the caller.
+    """
+    if parser == 'lxml':
+        return _parse_betalist_lxml(content, base_url)
+    if parser == 'strainer':
+        return _parse_betalist_soup(BeautifulSoup(content, 'lxml', parse_only=_BETALIST_STRAINER), base_url)
+    if parser == 'soup':
+        return _parse_betalist_soup(BeautifulSoup(content, 'html.parser'), base_url)
+    raise ValueError(f"Unknown parser: {parser} (expected one of {', '.join(PARSERS)})")
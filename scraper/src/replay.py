@@ -0,0 +1,418 @@
+"""
+Offline replay of a full crawl against the saved fixtures in scraper/data.
+
+A stand-in HTTP server (in its own process, so it does not show up in the
+scraper's CPU time) serves:
+- www.failory.com/cemetery: failory_debug.html, then failory_debug_new.html
+  as ?8bd93ea4_page=2; the 'Next' links are rewritten so the crawl follows
+  the fixtures in order and stops after the last one
+- betalist.com: betalist_home_debug.html for the homepage and every topic
+- the YC Algolia index: a fake query endpoint (batch facets, then paged hits
+  per batch) over the Y Combinator rows of a startups file, by default the
+  last real crawl in data/startups.csv
+
+yc_debug.html and ph_debug.html are not replayed: the YC scraper only talks
+to Algolia, and Product Hunt is not a source (that fixture is a Cloudflare
+challenge page).
+
+Every request of the real StartupScraper is routed to the server by a
+transport adapter mounted on its Fetcher session, so the scrapers, the
+orchestrator, the fetcher thread pool and the parsers all run unchanged.
+The per-host rate limits are lifted unless --polite is given.
+
+Each round reports pages/sec, records/sec, CPU ms per page and peak RSS, and
+checks the extracted records: YC must return exactly the hits served, and
+Failory/BetaList must match replay_expected.json (rewrite it with
+--update-expected after an intended parser change).
+
+Usage: python replay.py [--rounds 3] [--parser lxml] [--polite] [--json]
+                        [--algolia-data startups.csv] [--update-expected]
+"""
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import re
+import resource
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fetcher import Fetcher
+from orchestrator import Orchestrator
+from parsers import DEFAULT_PARSER, PARSERS
+from scraper import DEFAULT_HEADERS, HOST_LIMITS, StartupScraper
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+EXPECTED_PATH = os.path.join(DATA_DIR, 'replay_expected.json')
+
+FAILORY_PAGES = ['failory_debug.html', 'failory_debug_new.html']
+BETALIST_PAGE = 'betalist_home_debug.html'
+FAILORY_HOST = 'www.failory.com'
+BETALIST_HOST = 'betalist.com'
+ALGOLIA_HOST = '45bwzj1sgc-dsn.algolia.net'
+ALGOLIA_PATH = '/1/indexes/YCCompany_production/query'
+
+# Sources compared against replay_expected.json, by their 'source' field
+HTML_SOURCES = ['Failory', 'BetaList']
+YC_SOURCE = 'Y Combinator'
+
+_PAGE_LINK = re.compile(rb'href="\?(\w+_page)=\d+"')
+
+
+# --- Stand-in server ---
+
+def failory_pages() -> List[bytes]:
+    """
+    The Failory fixtures as cemetery pages 1..n, each linking to the next.
+    """
+    pages = []
+    for i, name in enumerate(FAILORY_PAGES, start=1):
+        with open(os.path.join(DATA_DIR, name), 'rb') as f:
+            content = f.read()
+        if i < len(FAILORY_PAGES):
+            content = _PAGE_LINK.sub(lambda m: b'href="?%s=%d"' % (m.group(1), i + 1), content)
+        else:
+            content = _PAGE_LINK.sub(b'', content)
+        pages.append(content)
+    return pages
+
+
+def algolia_companies(path: str) -> Dict[str, List[Dict]]:
+    """
+    Algolia hits by batch, from the Y Combinator rows of a startups file.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df = df[df['source'] == YC_SOURCE]
+    companies: Dict[str, List[Dict]] = {}
+    for row in df.itertuples(index=False):
+        companies.setdefault(row.batch, []).append({
+            'name': row.name,
+            'one_liner': row.description,
+            'long_description': '',
+            'website': row.website,
+            'batch': row.batch,
+        })
+    return companies
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real sites
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=utf-8'):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: int = 200):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def _route(self):
+        # Requests arrive as /<original host><original path>
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        return host, '/' + path, parse_qs(parts.query)
+
+    def do_GET(self):
+        host, path, query = self._route()
+        server = self.server
+        if host == '__replay' and path == '/stats':
+            with server.lock:
+                self._send_json(dict(server.hits))
+            return
+
+        body = None
+        if host == FAILORY_HOST and path == '/cemetery':
+            page = int(next((v[0] for k, v in query.items() if k.endswith('_page')), 1))
+            if 1 <= page <= len(server.failory):
+                body = server.failory[page - 1]
+        elif host == BETALIST_HOST and (path == '/' or path.startswith('/topics/')):
+            body = server.betalist
+
+        server.count(host)
+        if body is None:
+            self._send(404, b'Not found')
+        else:
+            self._send(200, body)
+
+    def do_POST(self):
+        host, path, _ = self._route()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server = self.server
+        server.count(host)
+        if host != ALGOLIA_HOST or path != ALGOLIA_PATH:
+            self._send_json({'message': 'Not found'}, 404)
+            return
+        if not self.headers.get('X-Algolia-API-Key') or not self.headers.get('X-Algolia-Application-Id'):
+            self._send_json({'message': 'Invalid Application-ID or API key'}, 403)
+            return
+
+        params = parse_qs(json.loads(body).get('params', ''))
+        hits_per_page = int(params.get('hitsPerPage', ['20'])[0])
+        if hits_per_page == 0:
+            facets = {batch: len(hits) for batch, hits in server.companies.items()}
+            self._send_json({'hits': [], 'nbHits': sum(facets.values()), 'facets': {'batch': facets}})
+            return
+
+        match = re.fullmatch(r'batch:"(.*)"', params.get('filters', [''])[0])
+        hits = server.companies.get(match.group(1), []) if match else []
+        page = int(params.get('page', ['0'])[0])
+        self._send_json({
+            'hits': hits[page * hits_per_page:(page + 1) * hits_per_page],
+            'page': page,
+            'nbPages': math.ceil(len(hits) / hits_per_page),
+            'nbHits': len(hits),
+        })
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, algolia_data: str):
+        super().__init__(address, ReplayHandler)
+        self.failory = failory_pages()
+        with open(os.path.join(DATA_DIR, BETALIST_PAGE), 'rb') as f:
+            self.betalist = f.read()
+        self.companies = algolia_companies(algolia_data)
+        self.lock = threading.Lock()
+        # Requests served per original host
+        self.hits: Dict[str, int] = {}
+
+    def count(self, host: str):
+        with self.lock:
+            self.hits[host] = self.hits.get(host, 0) + 1
+
+
+def _serve(algolia_data: str, ports):
+    server = ReplayServer(('127.0.0.1', 0), algolia_data)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_server(algolia_data: str):
+    """
+    Starts the stand-in server in a child process.
+    Returns (process, address as host:port).
+    """
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(algolia_data, ports), daemon=True)
+    process.start()
+    return process, f"127.0.0.1:{ports.get(timeout=30)}"
+
+
+class ReplayAdapter(HTTPAdapter):
+    """
+    Sends every request to the stand-in server instead of the real host,
+    as http://<address>/<host><path>?<query>.
+    """
+
+    def __init__(self, address: str, **kwargs):
+        self.address = address
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = urlunsplit(('http', self.address, f"/{parts.netloc}{parts.path}", parts.query, ''))
+        return super().send(request, **kwargs)
+
+
+def replay_fetcher(address: str, polite: bool = False) -> Fetcher:
+    if polite:
+        fetcher = Fetcher(headers=DEFAULT_HEADERS, host_limits=HOST_LIMITS)
+    else:
+        # Same concurrency per host, no request spacing
+        host_limits = {host: (limit, 1e6) for host, (limit, _) in HOST_LIMITS.items()}
+        fetcher = Fetcher(headers=DEFAULT_HEADERS, host_limits=host_limits, rate=1e6)
+    # All hosts now share one connection pool (the server's), so size it
+    # for all of them
+    pool_size = fetcher.max_workers * len(HOST_LIMITS)
+    adapter = ReplayAdapter(address, pool_connections=1, pool_maxsize=pool_size)
+    fetcher.session.mount('http://', adapter)
+    fetcher.session.mount('https://', adapter)
+    return fetcher
+
+
+# --- Benchmark ---
+
+def server_hits(address: str) -> Dict[str, int]:
+    return requests.get(f"http://{address}/__replay/stats", timeout=10).json()
+
+
+def run_round(address: str, parser: str, polite: bool) -> Dict:
+    """
+    One full crawl through the replay server. Returns the measurements and
+    the scraped records.
+    """
+    fetcher = replay_fetcher(address, polite)
+    scraper = StartupScraper(fetcher=fetcher, parser=parser)
+    orchestrator = Orchestrator(record_counter=scraper.sink.source_count, on_timeout=scraper.cancel)
+    for name, run in scraper.sources().items():
+        orchestrator.register(name, run, timeout=600, retries=0)
+
+    before = server_hits(address)
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    summary = orchestrator.run()
+    seconds = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    fetcher.close()
+
+    after = server_hits(address)
+    requests_by_host = {host: after[host] - before.get(host, 0) for host in after}
+    pages = sum(requests_by_host.values())
+    records = len(scraper.data)
+    return {
+        'ok': summary.ok,
+        'sources': summary.as_dict()['sources'],
+        'seconds': seconds,
+        'requests': requests_by_host,
+        'pages': pages,
+        'records': records,
+        'pages_per_sec': pages / seconds,
+        'records_per_sec': records / seconds,
+        'cpu_ms_per_page': cpu * 1000 / pages if pages else 0.0,
+        'data': scraper.data,
+    }
+
+
+# --- Regression check ---
+
+def by_source(records: List[Dict]) -> Dict[str, List[Dict]]:
+    grouped: Dict[str, List[Dict]] = {}
+    for record in records:
+        grouped.setdefault(record['source'], []).append(record)
+    return grouped
+
+
+def expected_yc(companies: Dict[str, List[Dict]]) -> List[Dict]:
+    return [{
+        'name': hit['name'],
+        'description': hit['one_liner'] or hit['long_description'],
+        'source': YC_SOURCE,
+        'status': 'Active',
+        'website': hit['website'],
+        'batch': hit['batch'],
+    } for hits in companies.values() for hit in hits]
+
+
+def _record_key(record: Dict):
+    return tuple(str(record.get(field)) for field in ('name', 'description', 'website', 'batch'))
+
+
+def check_records(records: List[Dict], expected: Dict[str, List[Dict]]) -> List[str]:
+    """
+    Compares scraped records with the expected ones per source.
+    Returns a list of problems (empty if everything matches).
+    """
+    problems = []
+    grouped = by_source(records)
+    for source, want in expected.items():
+        got = grouped.get(source, [])
+        if source == YC_SOURCE:
+            # Batches are fetched in parallel, so only the set is stable
+            got, want = sorted(got, key=_record_key), sorted(want, key=_record_key)
+        if got == want:
+            continue
+
+        problems.append(f"{source}: {len(got)} records, expected {len(want)}")
+        want_keys = {_record_key(r) for r in want}
+        got_keys = {_record_key(r) for r in got}
+        for key in sorted(want_keys - got_keys)[:3]:
+            problems.append(f"   missing: {key[0]!r}")
+        for key in sorted(got_keys - want_keys)[:3]:
+            problems.append(f"   unexpected: {key[0]!r}")
+        if want_keys == got_keys:
+            problems.append("   same records, different fields or order")
+    return problems
+
+
+def load_expected(path: str = EXPECTED_PATH) -> Optional[Dict[str, List[Dict]]]:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_expected(records: List[Dict], path: str = EXPECTED_PATH):
+    grouped = by_source(records)
+    with open(path, 'w') as f:
+        json.dump({source: grouped.get(source, []) for source in HTML_SOURCES}, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a full crawl against the saved fixtures.")
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER)
+    parser.add_argument('--polite', action='store_true', help="Keep the per-host rate limits of a real crawl")
+    parser.add_argument('--algolia-data', default=os.path.join(DATA_DIR, 'startups.csv'),
+                        help="Startups file whose Y Combinator rows back the fake Algolia index")
+    parser.add_argument('--update-expected', action='store_true',
+                        help="Rewrite replay_expected.json from the first round instead of checking it")
+    parser.add_argument('--json', action='store_true', help="Print a machine-readable report")
+    args = parser.parse_args(argv)
+
+    # The scraper logs every source (and warns about the dead ones); only
+    # the report matters here
+    logging.getLogger().setLevel(logging.ERROR)
+
+    process, address = start_server(args.algolia_data)
+    try:
+        expected = load_expected()
+        if expected is None and not args.update_expected:
+            print(f"No {os.path.basename(EXPECTED_PATH)}; run with --update-expected first.", file=sys.stderr)
+            return 1
+
+        rounds = []
+        for i in range(args.rounds):
+            result = run_round(address, args.parser, args.polite)
+            if i == 0 and args.update_expected:
+                save_expected(result['data'])
+                expected = load_expected()
+            wanted = {**expected, YC_SOURCE: expected_yc(algolia_companies(args.algolia_data))}
+            result['problems'] = ([] if result['ok'] else ['some sources failed']) + \
+                check_records(result['data'], wanted)
+            del result['data']
+            rounds.append(result)
+    finally:
+        process.terminate()
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    ok = all(not r['problems'] for r in rounds)
+    if args.json:
+        print(json.dumps({'parser': args.parser, 'polite': args.polite, 'ok': ok,
+                          'peak_rss_mb': round(peak_rss_mb, 1), 'rounds': rounds}, indent=2))
+    else:
+        print(f"parser={args.parser} polite={args.polite}")
+        print(f"{'round':<6} {'seconds':>8} {'pages':>6} {'records':>8} {'pages/s':>9} "
+              f"{'records/s':>10} {'cpu ms/page':>12}  check")
+        for i, r in enumerate(rounds, start=1):
+            print(f"{i:<6} {r['seconds']:>8.2f} {r['pages']:>6} {r['records']:>8} {r['pages_per_sec']:>9.1f} "
+                  f"{r['records_per_sec']:>10.0f} {r['cpu_ms_per_page']:>12.2f}  "
+                  f"{'ok' if not r['problems'] else 'FAILED'}")
+            for problem in r['problems']:
+                print(f"   {problem}")
+        print(f"Peak RSS {peak_rss_mb:.1f} MB")
+
+    # Non-zero exit on any extraction regression, so this doubles as a check
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
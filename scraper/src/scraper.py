@@ -1,22 +1,92 @@
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
+import requests
+import argparse
 import json
-import time
+import sys
+import threading
 import logging
 import os
-from typing import List, Dict
+import shutil
+from typing import List, Dict, Optional, Tuple
+
+from crawl_state import CrawlState, content_hash, merge_records
+from fetcher import TRANSIENT_STATUSES, Fetcher, TransientFetchError
+from orchestrator import Orchestrator
+from http_cache import HTTPCache
+from parsers import DEFAULT_PARSER, PARSERS, parse_betalist, parse_failory
+from sinks import FileSink, MemorySink, open_sink, read_records, replace_output, write_records
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+# Per-host (max concurrent requests, requests per second).
+# Algolia is an API built for this; the HTML sites get a gentler budget.
+HOST_LIMITS = {
+    '45bwzj1sgc-dsn.algolia.net': (8, 10.0),
+    'www.failory.com': (2, 2.0),
+    'betalist.com': (2, 2.0),
+}
+
+def default_data_dir() -> str:
+    # Default to data directory relative to this script
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    data_dir = os.path.join(base_dir, '..', 'data')
+    os.makedirs(data_dir, exist_ok=True)
+    return data_dir
+
 class StartupScraper:
-    def __init__(self):
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    def __init__(self, fetcher: Optional[Fetcher] = None, state: Optional[CrawlState] = None,
+                 sink: Optional[FileSink] = None, parser: str = DEFAULT_PARSER):
+        self.headers = dict(DEFAULT_HEADERS)
+        # HTML extraction backend for Failory/BetaList (see parsers.py)
+        self.parser = parser
+        # Records are streamed into the sink as each page/batch finishes.
+        # Without one they are kept in memory (self.data) as before.
+        self.sink = sink or MemorySink()
+        self.data: List[Dict] = self.sink.records if isinstance(self.sink, MemorySink) else []
+        self.fetcher = fetcher or Fetcher(headers=self.headers, host_limits=HOST_LIMITS)
+        # With a crawl state the scrapers skip pages/batches that have not
+        # changed since the last run (incremental mode)
+        self.state = state
+        # Sources asked to stop (orchestrator timeouts)
+        self._cancelled = set()
+        self._cancel_lock = threading.Lock()
+
+    def sources(self) -> Dict:
+        """
+        The scrapers by name, in the order they used to run. The names are
+        also the source keys used in the sink and crawl state.
+        """
+        return {
+            'yc': self.scrape_yc,
+            'failory': self.scrape_failory,
+            'betalist': self.scrape_betalist,
+            'autopsy': self.scrape_autopsy,
+            'graveyard': self.scrape_graveyard,
         }
-        self.data: List[Dict] = []
+
+    def cancel(self, source: str):
+        """
+        Asks a running scraper to stop after its current request. Records
+        it emits from now on are refused, so a page finishing late never
+        reaches the output.
+        """
+        with self._cancel_lock:
+            self._cancelled.add(source)
+        self.sink.reject(source)
+
+    def _is_cancelled(self, source: str) -> bool:
+        with self._cancel_lock:
+            return source in self._cancelled
+
+    def _check_cancelled(self, source: str):
+        if self._is_cancelled(source):
+            raise RuntimeError(f"{source} scrape cancelled")
 
     def scrape_yc(self):
         """
@@ -39,71 +109,92 @@ class StartupScraper:
             payload = {
                 "params": "hitsPerPage=0&facets=%5B%22batch%22%5D&tagFilters=%5B%22ycdc_public%22%5D"
             }
-            response = requests.post(url, headers=headers, json=payload)
+            response = self.fetcher.post(url, headers=headers, json=payload)
             response.raise_for_status()
             facets = response.json().get('facets', {}).get('batch', {})
             batches = list(facets.keys())
             logger.info(f"Found {len(batches)} batches to scrape.")
         except Exception as e:
             logger.error(f"Error fetching YC batches: {e}")
-            return
+            raise TransientFetchError(f"YC batch list: {e}") from e
+
+        if self.state is not None:
+            # Algolia does not support conditional requests, but the facet
+            # query already tells us how many companies each batch has.
+            # Batches whose count has not moved are skipped.
+            batches = [b for b in batches if self.state.get('yc', b).get('count') != facets[b]]
+            logger.info(f"{len(batches)} batches changed since the last crawl.")
+
+        # Batches finished before an interrupted run are already in the sink
+        batches = [b for b in batches if not self.sink.is_done('yc', b)]
+
+        # Step 2: Fetch batches in parallel (the fetcher enforces the rate limit)
+        results = self.fetcher.imap(lambda batch: self._fetch_yc_batch(url, headers, batch), batches, pool='yc')
 
         total_companies = 0
-        
-        # Step 2: Iterate over batches
-        for batch in batches:
-            # logger.info(f"Scraping batch: {batch}")
-            page = 0
-            while True:
-                # Filter by batch
-                filters = f'batch:"{batch}"'
-                # URL encode the filter? requests json handles it if we pass it correctly?
-                # Algolia params string needs to be carefully formatted.
-                # Better to use `facetFilters` in the params string or JSON.
-                # params string format: `facetFilters=[["batch:Winter 2024"]]`
-                
-                # Let's construct the params string carefully
-                # We can use `filters` parameter which is easier: `filters=batch:"Winter 2024"`
-                
-                payload = {
-                    "params": f"hitsPerPage=1000&page={page}&filters=batch:\"{batch}\"&tagFilters=%5B%22ycdc_public%22%5D"
-                }
-                
-                try:
-                    response = requests.post(url, headers=headers, json=payload)
-                    response.raise_for_status()
-                    data = response.json()
-                    hits = data.get('hits', [])
-                    
-                    if not hits:
-                        break
-                    
-                    for company in hits:
-                        self.data.append({
-                            'name': company.get('name'),
-                            'description': company.get('one_liner') or company.get('long_description'),
-                            'source': 'Y Combinator',
-                            'status': 'Active', 
-                            'website': company.get('website'),
-                            'batch': company.get('batch')
-                        })
-                    
-                    total_companies += len(hits)
-                    
-                    if page >= data.get('nbPages', 0) - 1:
-                        break
-                    page += 1
-                    time.sleep(0.1) 
-                    
-                except Exception as e:
-                    logger.error(f"Error scraping batch {batch}: {e}")
-                    break
-            
-            # logger.info(f"Finished batch {batch}. Total so far: {total_companies}")
-            time.sleep(0.1)
+        failed = []
+        for batch, (companies, complete) in zip(batches, results):
+            self._check_cancelled('yc')
+            if not complete:
+                # Not marked done, so a retry fetches it again
+                failed.append(batch)
+                continue
+            self.sink.emit('yc', batch, companies)
+            total_companies += len(companies)
+            if self.state is not None:
+                self.state.record('yc', batch, count=facets[batch])
+
+        if failed:
+            raise TransientFetchError(f"{len(failed)} YC batches failed: {', '.join(failed[:5])}")
 
         logger.info(f"Finished scraping YC. Total companies: {total_companies}")
 
+    def _fetch_yc_batch(self, url: str, headers: Dict, batch: str) -> Tuple[List[Dict], bool]:
+        """
+        Fetches every page of one YC batch. Runs on a fetcher worker thread.
+        Returns (companies, whether every page was fetched).
+        """
+        companies = []
+        page = 0
+        while True:
+            if self._is_cancelled('yc'):
+                return companies, False
+
+            # Algolia params string needs to be carefully formatted.
+            # We use the `filters` parameter which is easier: `filters=batch:"Winter 2024"`
+            payload = {
+                "params": f"hitsPerPage=1000&page={page}&filters=batch:\"{batch}\"&tagFilters=%5B%22ycdc_public%22%5D"
+            }
+
+            try:
+                response = self.fetcher.post(url, headers=headers, json=payload)
+                response.raise_for_status()
+                data = response.json()
+                hits = data.get('hits', [])
+
+                if not hits:
+                    break
+
+                for company in hits:
+                    companies.append({
+                        'name': company.get('name'),
+                        'description': company.get('one_liner') or company.get('long_description'),
+                        'source': 'Y Combinator',
+                        'status': 'Active',
+                        'website': company.get('website'),
+                        'batch': company.get('batch')
+                    })
+
+                if page >= data.get('nbPages', 0) - 1:
+                    break
+                page += 1
+
+            except Exception as e:
+                logger.error(f"Error scraping batch {batch}: {e}")
+                return companies, False
+
+        return companies, True
+
     def scrape_failory(self):
         """
         Scrapes Failory's cemetery for failed startups.
@@ -118,63 +209,53 @@ class StartupScraper:
         
         while url:
             # logger.info(f"Fetching Failory page {page_num}: {url}")
+            self._check_cancelled('failory')
+            done = self.sink.done_info('failory', url)
+            if done is not None:
+                # Finished before an interrupted run; we know where it led
+                url = done.get('next')
+                page_num += 1
+                continue
+
             try:
-                response = requests.get(url, headers=self.headers)
+                response = self.fetcher.get(url)
+                if response.status_code in TRANSIENT_STATUSES:
+                    raise TransientFetchError(f"Failory page {page_num}: HTTP {response.status_code}")
                 if response.status_code != 200:
                     logger.error(f"Failed to fetch {url}: {response.status_code}")
                     break
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Cards are in 'a' tags with class 'cemetery-card-link-block'
-                cards = soup.find_all('a', class_='cemetery-card-link-block')
-                
-                if not cards:
+
+                # Incremental mode: an unchanged page has nothing new, and we
+                # already know where its 'Next' link points
+                digest = content_hash(response.content)
+                if self.state is not None:
+                    previous = self.state.get('failory', url)
+                    if previous.get('hash') == digest and 'next' in previous:
+                        url = previous['next']
+                        page_num += 1
+                        continue
+
+                records, next_href = parse_failory(response.content, base_url, self.parser)
+
+                if not records:
                     logger.warning(f"No cards found on page {page_num}")
                     break
-                
-                for card in cards:
-                    # Name is usually in h3 or div with class 'card-title-black'
-                    name_tag = card.find(class_='card-title-black')
-                    if not name_tag:
-                        continue
-                    
-                    name = name_tag.text.strip()
-                    
-                    # Description
-                    desc_tag = card.find(class_='card-date-black') # Based on debug HTML, description is here
-                    description = desc_tag.text.strip() if desc_tag else None
-                    
-                    # Link
-                    link = f"{base_url}{card['href']}" if card.get('href') else None
-                    
-                    # Status - Failory is about failed startups, but some might be acquired
-                    # We can try to find the 'outcome' filter tag if present, or default to 'Failed'
-                    # In the debug HTML, there are hidden fields like fs-list-field="outcome"
-                    outcome = "Failed"
-                    outcome_tag = card.find(attrs={"fs-list-field": "outcome"})
-                    if outcome_tag:
-                        outcome = outcome_tag.text.strip()
-                    
-                    self.data.append({
-                        'name': name,
-                        'description': description,
-                        'source': 'Failory',
-                        'status': outcome,
-                        'website': link,
-                        'batch': None
-                    })
-                    count += 1
-                
+                count += len(records)
+
                 # Pagination
-                next_button = soup.find('a', class_='w-pagination-next')
-                if next_button and next_button.get('href'):
-                    url = f"{base_url}/cemetery{next_button['href']}" # href is likely like ?page=2
-                    page_num += 1
-                    time.sleep(0.5)
-                else:
-                    url = None
+                next_url = None
+                if next_href:
+                    next_url = f"{base_url}/cemetery{next_href}" # href is likely like ?page=2
+
+                self.sink.emit('failory', url, records, next=next_url)
+                if self.state is not None:
+                    self.state.record('failory', url, digest, next=next_url)
+                url = next_url
+                page_num += 1
                     
+            except (TransientFetchError, requests.RequestException):
+                # Pages done so far are checkpointed; a retry picks up here
+                raise
             except Exception as e:
                 logger.error(f"Error scraping Failory page {page_num}: {e}")
                 break
@@ -219,81 +300,165 @@ class StartupScraper:
         
         # Pre-populate seen_names with existing data to avoid duplicates across sources if needed
         # But for now just avoid duplicates within BetaList scrape
-        
-        for topic in topics:
+
+        def fetch_topic(topic):
+            try:
+                return self.fetcher.get(f"{base_url}{topic}")
+            except Exception as e:
+                return e
+
+        # Topics are fetched in parallel, then parsed in order so the
+        # de-duplication keeps the same first-seen record as before
+        topics = [t for t in topics if not self.sink.is_done('betalist', t)]
+        responses = self.fetcher.imap(fetch_topic, topics, pool='betalist')
+
+        failed = []
+        for topic, response in zip(topics, responses):
             url = f"{base_url}{topic}"
-            # logger.info(f"Fetching BetaList topic: {topic}")
+            self._check_cancelled('betalist')
             try:
-                response = requests.get(url, headers=self.headers)
+                if isinstance(response, Exception):
+                    raise response
+                if response.status_code in TRANSIENT_STATUSES:
+                    raise TransientFetchError(f"HTTP {response.status_code}")
                 # BetaList might 404 on some topics if they don't exist, but these are from homepage
                 if response.status_code != 200:
                     logger.warning(f"Failed to fetch {url}: {response.status_code}")
                     continue
-                
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Startups are usually in a div with id starting with 'startup-' inside a grid
-                # Based on debug HTML: <div class="block" id="startup-140720">
-                startup_cards = soup.find_all('div', id=lambda x: x and x.startswith('startup-'))
-                
-                for card in startup_cards:
-                    # Name is in an 'a' tag with class 'font-medium'
-                    # <a ... href="/startups/mindpali">Mindpali</a>
-                    name_tag = card.find('a', class_='font-medium')
-                    if not name_tag:
-                        continue
-                    
-                    name = name_tag.text.strip()
-                    if name in seen_names:
+
+                digest = content_hash(response.content)
+                if self.state is not None and self.state.is_unchanged('betalist', topic, digest):
+                    continue
+
+                records = []
+                for record in parse_betalist(response.content, base_url, self.parser):
+                    if record['name'] in seen_names:
                         continue
-                    
-                    # Description is in the next 'a' tag or div
-                    # <a class="block text-gray-500..." href="...">Turn study notes...</a>
-                    desc_tag = card.find('a', class_='text-gray-500')
-                    description = desc_tag.text.strip() if desc_tag else None
-                    
-                    # Link
-                    link = f"{base_url}{name_tag['href']}"
-                    
-                    self.data.append({
-                        'name': name,
-                        'description': description,
-                        'source': 'BetaList',
-                        'status': 'Active', # BetaList is for new startups
-                        'website': link, # This is the BetaList profile link. The actual site is on that page.
-                        'batch': None
-                    })
-                    seen_names.add(name)
+                    records.append(record)
+                    seen_names.add(record['name'])
                     count += 1
-                
-                time.sleep(0.5) # Be nice
-                
+
+                self.sink.emit('betalist', topic, records)
+                if self.state is not None:
+                    self.state.record('betalist', topic, digest)
+
+            except (TransientFetchError, requests.RequestException) as e:
+                logger.error(f"Error scraping BetaList {topic}: {e}")
+                failed.append(topic)
             except Exception as e:
                 logger.error(f"Error scraping BetaList {topic}: {e}")
         
         logger.info(f"Found {count} startups from BetaList.")
+        if failed:
+            raise TransientFetchError(f"{len(failed)} BetaList topics failed: {', '.join(failed)}")
 
-    def save_data(self, filename=None):
+    def save_data(self, filename=None, merge=False):
+        """
+        Writes the scraped records. With merge=True (incremental mode) they are
+        upserted into the existing file instead of replacing it.
+        With a streaming sink the records are already on disk; this only
+        publishes the finished file.
+        """
         if filename is None:
-            # Default to data directory relative to this script
-            base_dir = os.path.dirname(os.path.abspath(__file__))
-            data_dir = os.path.join(base_dir, '..', 'data')
-            os.makedirs(data_dir, exist_ok=True)
-            filename = os.path.join(data_dir, 'startups.csv')
+            filename = os.path.join(default_data_dir(), 'startups.csv')
 
-        if not self.data:
+        streamed = isinstance(self.sink, FileSink)
+        if streamed:
+            self.sink.close()
+
+        root, ext = os.path.splitext(filename)
+        tmp_filename = f"{root}.tmp{ext}"
+        if merge and os.path.exists(filename):
+            existing = read_records(filename)
+            if not streamed:
+                records = self.data
+            elif self.sink.count:
+                records = read_records(self.sink.path).to_dict('records')
+            else:
+                records = []
+            df, added, updated = merge_records(existing, records)
+            logger.info(f"Merged crawl: {added} new, {updated} updated records.")
+            write_records(df, tmp_filename)
+            replace_output(tmp_filename, filename)
+            total = len(df)
+        elif self.sink.count == 0:
             logger.warning("No data to save.")
             return
-        
-        df = pd.DataFrame(self.data)
-        df.to_csv(filename, index=False)
-        logger.info(f"Saved {len(df)} records to {filename}")
+        elif streamed:
+            replace_output(self.sink.path, filename)
+            total = self.sink.count
+        else:
+            df = pd.DataFrame(self.data)
+            write_records(df, tmp_filename)
+            replace_output(tmp_filename, filename)
+            total = len(df)
+        logger.info(f"Saved {total} records to {filename}")
+
+        if streamed:
+            self.sink.remove_checkpoint()
+            if os.path.isdir(self.sink.path):
+                shutil.rmtree(self.sink.path)
+            elif os.path.exists(self.sink.path):
+                os.remove(self.sink.path)
+
+        # Only now is it safe to remember what we have seen
+        if self.state is not None:
+            self.state.save()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Scrape startup listings into startups.csv")
+    parser.add_argument('--output', help="Output file (.csv, .jsonl or .parquet); defaults to data/startups.csv")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Use the HTTP cache and crawl state; only merge changed records")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted crawl from its last checkpoint")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER,
+                        help="HTML parsing backend for Failory/BetaList")
+    parser.add_argument('--source-timeout', type=float, default=1800,
+                        help="Seconds before a single source is given up on")
+    parser.add_argument('--retries', type=int, default=2,
+                        help="Retries per source on transient (network/5xx/429) failures")
+    parser.add_argument('--allow-partial', action='store_true',
+                        help="Publish the output even if some sources failed")
+    parser.add_argument('--summary-json', help="Also write the run summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    data_dir = default_data_dir()
+    output = args.output or os.path.join(data_dir, 'startups.csv')
+
+    # Records stream into a work file next to the output and only replace
+    # (or, incrementally, merge into) the output once the crawl completes
+    root, ext = os.path.splitext(output)
+    work_path = f"{root}.{'delta' if args.incremental else 'partial'}{ext}"
+    sink = open_sink(work_path, resume=args.resume)
+
+    if args.incremental:
+        fetcher = Fetcher(headers=DEFAULT_HEADERS, host_limits=HOST_LIMITS,
+                          cache=HTTPCache(os.path.join(data_dir, '.http_cache')))
+        scraper = StartupScraper(fetcher=fetcher, sink=sink, parser=args.parser,
+                                 state=CrawlState(os.path.join(data_dir, 'crawl_state.json')))
+    else:
+        scraper = StartupScraper(sink=sink, parser=args.parser)
+
+    # All sources hit independent hosts, so run them concurrently
+    orchestrator = Orchestrator(record_counter=scraper.sink.source_count, on_timeout=scraper.cancel)
+    for name, run in scraper.sources().items():
+        orchestrator.register(name, run, timeout=args.source_timeout, retries=args.retries)
+    summary = orchestrator.run()
+    logger.info("Run summary:\n" + summary.format())
+
+    if args.summary_json:
+        with open(args.summary_json, 'w') as f:
+            json.dump(summary.as_dict(), f, indent=2)
+
+    if not summary.ok and not args.allow_partial:
+        # Keep the work file and checkpoint around for --resume
+        scraper.sink.close()
+        logger.error("Some sources failed; not publishing. Re-run with --resume to continue.")
+        return 1
+
+    scraper.save_data(output, merge=args.incremental)
+    return 0
 
 if __name__ == "__main__":
-    scraper = StartupScraper()
-    scraper.scrape_yc()
-    scraper.scrape_failory()
-    scraper.scrape_betalist()
-    scraper.scrape_autopsy()
-    scraper.scrape_graveyard()
-    scraper.save_data()
+    sys.exit(main())
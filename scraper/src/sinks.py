@@ -0,0 +1,302 @@
+import csv
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Column order of startups.csv
+FIELDS = ['name', 'description', 'source', 'status', 'website', 'batch']
+
+
+class RecordSink:
+    """
+    Destination for scraped records.
+    Scrapers emit the records of one unit of work (a YC batch, a Failory page,
+    a BetaList topic) at a time and then mark that unit done. Sinks flush
+    periodically, and only between units, so the checkpoint written with each
+    flush always matches what is on disk.
+    """
+
+    def __init__(self, flush_every: int = 500, flush_interval: float = 5.0):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.count = 0
+        self.counts: Dict[str, int] = {}
+        self.lock = threading.Lock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._done: Dict[str, Dict[str, Dict]] = {}
+        # Sources whose later records are refused (see reject)
+        self._rejected = set()
+        self._closed = False
+
+    # --- records ---
+
+    def emit(self, source: str, unit: str, records: List[Dict], **info):
+        """
+        Writes all records of one unit and marks it done.
+        `info` is stored in the checkpoint (e.g. the next page URL).
+        Raises RuntimeError once the sink is closed or the source rejected.
+        """
+        with self.lock:
+            if self._closed or source in self._rejected:
+                raise RuntimeError(f"{source}: sink no longer accepts records")
+            for record in records:
+                self._write(record)
+            self.count += len(records)
+            self.counts[source] = self.counts.get(source, 0) + len(records)
+            self._pending += len(records)
+            self._done.setdefault(source, {})[unit] = info
+
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if self._pending >= self.flush_every or due:
+                self._flush()
+
+    def reject(self, source: str):
+        """
+        Refuses every later emit of source. Used for sources that timed out,
+        whose thread may still be finishing a page.
+        """
+        with self.lock:
+            self._rejected.add(source)
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def close(self):
+        with self.lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self._close()
+
+    # --- checkpoints ---
+
+    def done_info(self, source: str, unit: str) -> Optional[Dict]:
+        """
+        Returns the checkpoint info of a finished unit, or None if it has
+        not been finished (in this run or the one being resumed).
+        """
+        with self.lock:
+            return self._done.get(source, {}).get(unit)
+
+    def is_done(self, source: str, unit: str) -> bool:
+        return self.done_info(source, unit) is not None
+
+    def source_count(self, source: str) -> int:
+        with self.lock:
+            return self.counts.get(source, 0)
+
+    def _flush(self):
+        self._flush_records()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+        self._save_checkpoint()
+
+    # --- hooks for subclasses ---
+
+    def _write(self, record: Dict):
+        raise NotImplementedError
+
+    def _flush_records(self):
+        pass
+
+    def _save_checkpoint(self):
+        pass
+
+    def _close(self):
+        pass
+
+
+class MemorySink(RecordSink):
+    """
+    Keeps records in a list. This is what StartupScraper uses when no sink is
+    given, so self.data / save_data keep working for small runs.
+    """
+
+    def __init__(self):
+        super().__init__(flush_every=0, flush_interval=float('inf'))
+        self.records: List[Dict] = []
+
+    def _write(self, record: Dict):
+        self.records.append(record)
+
+    def _flush(self):
+        pass
+
+
+class FileSink(RecordSink):
+    """
+    Base class for on-disk sinks with a JSON checkpoint next to the output.
+    With resume=True an interrupted run continues where the last checkpoint
+    left off; anything written after that checkpoint is discarded.
+    """
+
+    def __init__(self, path: str, resume: bool = False, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.checkpoint_path = f"{path}.checkpoint.json"
+
+        checkpoint = None
+        if resume and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path) as f:
+                checkpoint = json.load(f)
+            self._done = checkpoint.get('done', {})
+            self.count = checkpoint.get('count', 0)
+            self.counts = checkpoint.get('counts', {})
+            logger.info(f"Resuming {path} from checkpoint ({self.count} records).")
+        self._open(checkpoint)
+
+    def _open(self, checkpoint: Optional[Dict]):
+        raise NotImplementedError
+
+    def _checkpoint_extra(self) -> Dict:
+        return {}
+
+    def _save_checkpoint(self):
+        payload = {'count': self.count, 'counts': self.counts, 'done': self._done, **self._checkpoint_extra()}
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def remove_checkpoint(self):
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+class _TextFileSink(FileSink):
+    """
+    Append-only text output. The checkpoint stores the byte offset after the
+    last flush; resuming truncates the file back to it.
+    """
+
+    def _open(self, checkpoint: Optional[Dict]):
+        if checkpoint is not None and os.path.exists(self.path):
+            self.file = open(self.path, 'r+', newline='', encoding='utf-8')
+            self.file.truncate(checkpoint.get('offset', 0))
+            self.file.seek(0, os.SEEK_END)
+            fresh = False
+        else:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            fresh = True
+        self._start(fresh)
+
+    def _start(self, fresh: bool):
+        pass
+
+    def _flush_records(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def _checkpoint_extra(self) -> Dict:
+        return {'offset': self.file.tell()}
+
+    def _close(self):
+        self.file.close()
+
+
+class CSVSink(_TextFileSink):
+    def _start(self, fresh: bool):
+        self.writer = csv.DictWriter(self.file, fieldnames=FIELDS, extrasaction='ignore', lineterminator='\n')
+        if fresh:
+            self.writer.writeheader()
+
+    def _write(self, record: Dict):
+        self.writer.writerow(record)
+
+
+class JSONLSink(_TextFileSink):
+    def _write(self, record: Dict):
+        self.file.write(json.dumps({field: record.get(field) for field in FIELDS}) + '\n')
+
+
+class ParquetSink(FileSink):
+    """
+    Writes a directory of Parquet part files, one per flush, readable with
+    pd.read_parquet(path). Needs pyarrow.
+    """
+
+    def _open(self, checkpoint: Optional[Dict]):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("ParquetSink needs pyarrow (pip install pyarrow)") from e
+
+        self.parts = checkpoint.get('parts', 0) if checkpoint else 0
+        if checkpoint is None and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+        # Drop parts written after the checkpoint
+        for name in os.listdir(self.path):
+            if name.startswith('part-') and int(name[5:10]) >= self.parts:
+                os.remove(os.path.join(self.path, name))
+        self.buffer: List[Dict] = []
+
+    def _write(self, record: Dict):
+        self.buffer.append(record)
+
+    def _flush_records(self):
+        if not self.buffer:
+            return
+        df = pd.DataFrame(self.buffer, columns=FIELDS)
+        df.to_parquet(os.path.join(self.path, f"part-{self.parts:05d}.parquet"), index=False)
+        self.parts += 1
+        self.buffer = []
+
+    def _checkpoint_extra(self) -> Dict:
+        return {'parts': self.parts}
+
+
+SINKS = {
+    '.csv': CSVSink,
+    '.jsonl': JSONLSink,
+    '.parquet': ParquetSink,
+}
+
+
+def open_sink(path: str, resume: bool = False, **kwargs) -> FileSink:
+    """
+    Picks the sink by file extension (.csv, .jsonl, .parquet).
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unsupported output format: {ext} (expected one of {', '.join(SINKS)})")
+    return SINKS[ext](path, resume=resume, **kwargs)
+
+
+def read_records(path: str) -> pd.DataFrame:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.jsonl':
+        return pd.read_json(path, lines=True)
+    if ext == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_records(df: pd.DataFrame, path: str):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.jsonl':
+        df.to_json(path, orient='records', lines=True)
+    elif ext == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def replace_output(src: str, dest: str):
+    """
+    Atomically moves a finished output (file or Parquet directory) into place.
+    """
+    if os.path.isdir(dest):
+        shutil.rmtree(dest)
+    os.replace(src, dest)